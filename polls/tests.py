@@ -1,3 +1,882 @@
-from django.test import TestCase
+import json
+import re
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf.urls import include, url
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import BooleanField, Case, Value, When
+from django.db.models.signals import post_save
+from django.template import Engine, RequestContext
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+from singleurlcrud.deletion import BulkDelete, get_cascade_counts
+from singleurlcrud.pagination import CachedCount, KeysetPaginator
+from singleurlcrud.search import SQLiteFTSSearch
+from singleurlcrud.timing import request_timed
+from singleurlcrud.views import ListRow, has_index_for
+
+from .models import Author, Choice, Question
+from .views import AuthorCRUDView, QuestionCRUDView
+
+
+class CachedQuestionCRUDView(QuestionCRUDView):
+    count_strategy = 'cached'
+
+
+class CachedAuthorCRUDView(AuthorCRUDView):
+    count_strategy = 'cached'
+
+
+class RowCacheQuestionCRUDView(QuestionCRUDView):
+    list_display = ('question_text', 'author__name')
+    row_cache = True
+    # rows are versioned by the generations bumped by the signal receivers
+    row_version_field = 'pub_date'
+
+
+class FlagsQuestionCRUDView(QuestionCRUDView):
+    editable_calls = []
+
+    def get_item_deletable_annotation(self):
+        return Case(When(author__isnull=True, then=Value(True)),
+                default=Value(False), output_field=BooleanField())
+
+    def items_editable(self, objects):
+        self.editable_calls.append(len(objects))
+        return dict((obj.pk, obj.question_text != 'q001') for obj in objects)
+
+
+class LookupQuestionCRUDView(QuestionCRUDView):
+    autocomplete_fields = {'author': ('name',)}
+    lookup_page_size = 2
+
+    def get_form(self, form_class, **kwargs):
+        form = super(LookupQuestionCRUDView, self).get_form(form_class, **kwargs)
+        form.fields['author'].queryset = Author.objects.exclude(email='hidden')
+        return form
+
+
+class FormQuestionCRUDView(QuestionCRUDView):
+    forms_built = []
+
+    def get_form(self, form_class, **kwargs):
+        self.forms_built.append(form_class)
+        return super(FormQuestionCRUDView, self).get_form(form_class, **kwargs)
+
+
+class SearchQuestionCRUDView(QuestionCRUDView):
+    search_fields = ('question_text',)
+    list_filter = ('author',)
+
+
+class ExportQuestionCRUDView(QuestionCRUDView):
+    allow_export = True
+    export_fields = ('question_text', 'author__name')
+    export_chunk_size = 2
+
+
+class ImportQuestionCRUDView(QuestionCRUDView):
+    allow_import = True
+
+
+class ProjectedQuestionCRUDView(QuestionCRUDView):
+    list_display = ('question_text', 'author__name')
+    list_dependencies = {'__str__': ('question_text',)}
+
+
+class ConditionalQuestionCRUDView(QuestionCRUDView):
+    conditional_get = True
+
+
+class PartialQuestionCRUDView(QuestionCRUDView):
+    partial_updates = True
+
+    def item_editable(self, obj):
+        return obj.question_text != 'readonly'
+
+
+class InfiniteQuestionCRUDView(QuestionCRUDView):
+    infinite_scroll = True
+    rows_chunk_size = 4
+
+
+class TimingQuestionCRUDView(QuestionCRUDView):
+    server_timing = True
+
+
+urlpatterns = [
+    url(r'^polls/', include('polls.urls', namespace='polls')),
+    url(r'^cached/questions/$', CachedQuestionCRUDView.as_view()),
+    url(r'^cached/authors/$', CachedAuthorCRUDView.as_view()),
+    url(r'^rowcache/$', RowCacheQuestionCRUDView.as_view()),
+    url(r'^flags/$', FlagsQuestionCRUDView.as_view()),
+    url(r'^lookup/$', LookupQuestionCRUDView.as_view()),
+    url(r'^form/$', FormQuestionCRUDView.as_view()),
+    url(r'^search/$', SearchQuestionCRUDView.as_view()),
+    url(r'^export/$', ExportQuestionCRUDView.as_view()),
+    url(r'^import/$', ImportQuestionCRUDView.as_view()),
+    url(r'^projected/$', ProjectedQuestionCRUDView.as_view()),
+    url(r'^conditional/$', ConditionalQuestionCRUDView.as_view()),
+    url(r'^partial/$', PartialQuestionCRUDView.as_view()),
+    url(r'^infinite/$', InfiniteQuestionCRUDView.as_view()),
+    url(r'^timing/$', TimingQuestionCRUDView.as_view()),
+    ]
+
+
+def create_questions(author, count, pub_date=None):
+    pub_date = pub_date or timezone.now().replace(microsecond=0)
+    return [Question.objects.create(question_text='q%03d' % i,
+        pub_date=pub_date, author=author) for i in range(count)]
+
+
+def question_data(question, **values):
+    data = {
+        'question_text': question.question_text,
+        'pub_date': question.pub_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'author': question.author_id,
+        }
+    data.update(values)
+    return data
+
+
+def formset_data(author, questions, extra=0):
+    data = {
+        'name': author.name,
+        'email': author.email or '',
+        'question_set-TOTAL_FORMS': len(questions) + extra,
+        'question_set-INITIAL_FORMS': len(questions),
+        'question_set-MIN_NUM_FORMS': 0,
+        'question_set-MAX_NUM_FORMS': 1000,
+        }
+    for index, question in enumerate(questions):
+        for name, value in question_data(question, id=question.pk).items():
+            data['question_set-%d-%s' % (index, name)] = value
+    return data
+
+
+def make_view(view_class, path='/', **params):
+    request = RequestFactory().get(path, params)
+    request.user = AnonymousUser()
+    view = view_class()
+    view.request, view.args, view.kwargs = request, (), {}
+    return view
+
+
+def normalize(html):
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+class RenderRowsTests(TestCase):
+
+    def test_matches_render_item(self):
+        author = Author.objects.create(name='A')
+        create_questions(author, 5)
+        view = make_view(QuestionCRUDView, '/polls/questions/')
+        rows = list(view.get_queryset())
+        state = {'view': view, 'actions': view.get_actions_as_str()}
+        self.assertTrue(state['actions'])
+        template = Engine.get_default().from_string(
+                '{% load crud_tags %}{% for item in rows %}'
+                '{% render_item item forloop.counter0 item_template %}'
+                '{% endfor %}')
+        expected = template.render(RequestContext(view.request,
+            dict(state, rows=rows, item_template=view.get_item_template())))
+        rendered = view.render_rows(dict(state), rows)
+        self.assertEqual(normalize(rendered), normalize(expected))
+        self.assertEqual(rendered.count('<tr data-pk='), 5)
+        self.assertEqual(rendered.count('item-selection-checkbox'), 5)
+
+
+class ColumnPlanTests(TestCase):
+
+    def test_labels_and_values(self):
+        class View(AuthorCRUDView):
+            list_display = ('name', 'question_set', 'question_set__question_text')
+
+        author = Author.objects.create(name='A')
+        create_questions(author, 2)
+        view = make_view(View)
+        self.assertEqual([force_text(view.label_for_field(name))
+            for name in View.list_display], ['Name', 'Questions', 'Question text'])
+        self.assertEqual(view.get_list_field_value('question_set__question_text',
+            author), 'q000, q001')
+
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name='A')
+        now = timezone.now().replace(microsecond=0)
+        # three distinct dates, with 5 questions (ties) each
+        for day in range(3):
+            create_questions(author, 5, now - timedelta(days=day))
+
+    def walk(self, queryset, per_page):
+        paginator = KeysetPaginator(queryset, per_page)
+        pages = [paginator.page()]
+        # bounded, so that a seek that doesn't advance fails the test
+        while pages[-1].has_next() and len(pages) < 10:
+            pages.append(paginator.page(pages[-1].next_cursor()))
+        return paginator, pages
+
+    def test_pages_follow_ordering_across_ties(self):
+        for ordering in (('pub_date',), ('-pub_date',), ('-pub_date', 'question_text')):
+            queryset = Question.objects.order_by(*ordering)
+            # ties are broken by the pk, in the direction of the last key
+            pk = '-pk' if ordering[-1].startswith('-') else 'pk'
+            expected = list(queryset.order_by(*(ordering + (pk,))))
+            paginator, pages = self.walk(queryset, 4)
+            rows = [obj for page in pages for obj in page.object_list]
+            self.assertEqual(rows, expected, ordering)
+            self.assertEqual(len(pages), 4)
+            self.assertFalse(pages[0].has_previous())
+
+    def test_previous_pages(self):
+        paginator, pages = self.walk(Question.objects.order_by('-pub_date'), 4)
+        for index in range(len(pages) - 1, 0, -1):
+            previous = paginator.page(pages[index].previous_cursor())
+            self.assertEqual(previous.object_list, pages[index-1].object_list)
+            self.assertTrue(previous.has_next())
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class CachedCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='A', email='')
+        self.questions = create_questions(self.author, 3)
+        self.strategy = CachedCount()
+        self.queryset = Question.objects.filter(question_text__startswith='q')
+        self.assertEqual(self.strategy.count(self.queryset), (3, False))
+
+    def test_invalidated_by_edit(self):
+        question = self.questions[0]
+        response = self.client.post('/cached/questions/?o=edit&item=%d' % question.pk,
+                question_data(question, question_text='edited'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.strategy.count(self.queryset), (2, False))
+
+    def test_invalidated_by_formset_save(self):
+        data = formset_data(self.author, self.questions)
+        data['question_set-0-DELETE'] = 'on'
+        response = self.client.post('/cached/authors/?o=edit&item=%d' % self.author.pk,
+                data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.strategy.count(self.queryset), (2, False))
+
+
+class StreamedListTests(TestCase):
+
+    def test_all_rows_are_streamed(self):
+        author = Author.objects.create(name='A')
+        create_questions(author, 45)
+        response = self.client.get('/polls/questions/?page=all')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(content.count('<tr data-pk='), 45)
+        self.assertIn('q044', content)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class RowCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rows_invalidated_by_save(self):
+        author = Author.objects.create(name='A')
+        question = create_questions(author, 3)[0]
+        self.assertEqual(self.client.get('/rowcache/').status_code, 200)
+        self.assertTrue(RowCacheQuestionCRUDView.__dict__.get('_signals_connected'))
+        question.question_text = 'edited'
+        question.save()
+        content = self.client.get('/rowcache/').content.decode('utf-8')
+        self.assertIn('edited', content)
+        self.assertEqual(content.count('<tr data-pk='), 3)
+        # the author's name is displayed in the cached rows
+        author.name = 'Renamed'
+        author.save()
+        content = self.client.get('/rowcache/').content.decode('utf-8')
+        self.assertEqual(content.count('Renamed'), 3)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class RowFlagsTests(TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name='A')
+        self.questions = create_questions(author, 3) + create_questions(None, 1)
+        FlagsQuestionCRUDView.editable_calls = []
+
+    def test_list_flags(self):
+        content = self.client.get('/flags/').content.decode('utf-8')
+        # the flags of all the rows of the page are determined together
+        self.assertEqual(FlagsQuestionCRUDView.editable_calls, [4])
+        self.assertEqual([question.pk for question in self.questions
+            if 'editItemThunk(%d)' % question.pk in content],
+            [self.questions[0].pk, self.questions[2].pk, self.questions[3].pk])
+        self.assertEqual([question.pk for question in self.questions
+            if 'deleteItemThunk(%d,' % question.pk in content],
+            [self.questions[3].pk])
+
+    def test_operations_honour_flags(self):
+        question = self.questions[1]
+        response = self.client.post('/flags/?o=edit&item=%d' % question.pk,
+                question_data(question, question_text='edited'))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/flags/?o=delete&item=%d' % self.questions[0].pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Question.objects.count(), 4)
+        response = self.client.post('/flags/?o=delete&item=%d' % self.questions[3].pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Question.objects.count(), 3)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class LookupTests(TestCase):
+
+    def lookup(self, **params):
+        params.update(o='lookup', field='author')
+        response = self.client.get('/lookup/', params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode('utf-8'))
+
+    def test_prefix_pages(self):
+        for name in ('Smythe', 'smith', 'Jones', 'Smart', 'Ismay'):
+            Author.objects.create(name=name,
+                    email='hidden' if name == 'Smart' else '')
+        names = dict(Author.objects.values_list('pk', 'name'))
+        page = self.lookup(q='SM')
+        # case insensitive prefix, choices of the form's queryset only
+        self.assertEqual(sorted(names[result['id']] for result in page['results']),
+                ['Smythe', 'smith'])
+        self.assertFalse(page['more'])
+        page = self.lookup(q='', page=1)
+        self.assertEqual(len(page['results']), 2)
+        self.assertTrue(page['more'])
+        page = self.lookup(q='', page=2)
+        self.assertEqual(len(page['results']), 2)
+        self.assertFalse(page['more'])
+
+    def test_unknown_field(self):
+        response = self.client.get('/lookup/', {'o': 'lookup', 'field': 'pub_date'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class FormTests(TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name='A')
+        FormQuestionCRUDView.forms_built = []
+
+    def test_form_built_once_per_request(self):
+        question = create_questions(self.author, 1)[0]
+        for path in ('/form/?o=add', '/form/?o=edit&item=%d' % question.pk):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'name="question_text"')
+        # the form class is built once and cached in the view class
+        self.assertEqual(len(FormQuestionCRUDView.forms_built), 2)
+        self.assertIs(FormQuestionCRUDView.forms_built[0],
+                FormQuestionCRUDView.forms_built[1])
+
+    def test_valid_post_does_not_list_choices(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/form/?o=add', {
+                'question_text': 'new',
+                'pub_date': '2020-01-01 10:00:00',
+                'author': self.author.pk,
+                })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Question.objects.filter(question_text='new').exists())
+        # the author is validated by its pk, all the authors are not listed
+        selects = [query['sql'] for query in queries.captured_queries
+                if 'SELECT' in query['sql'] and 'polls_author' in query['sql']]
+        self.assertTrue(selects)
+        self.assertTrue(all('WHERE' in sql for sql in selects), selects)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ItemQueryTests(TestCase):
+
+    def test_list_arguments_not_applied(self):
+        author = Author.objects.create(name='A', email='')
+        other = Author.objects.create(name='B', email='')
+        question = create_questions(author, 1)[0]
+        # the list's search and filter would exclude the item
+        path = '/search/?q=nomatch&author=%d&sort=-pub_date&o=edit&item=%d' % (
+                other.pk, question.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'value="q000"')
+        item_queries = [query['sql'] for query in queries.captured_queries
+                if 'FROM "polls_question"' in query['sql']]
+        self.assertEqual(len(item_queries), 1)
+        self.assertNotIn('LIKE', item_queries[0])
+        self.assertNotIn('ORDER BY', item_queries[0])
+        response = self.client.post(path, question_data(question, question_text='edited'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Question.objects.get(pk=question.pk).question_text, 'edited')
+
+
+class BulkDeleteTests(TestCase):
+
+    def setUp(self):
+        self.authors = [Author.objects.create(name='A%d' % i) for i in range(5)]
+        for author in self.authors:
+            for question in create_questions(author, 3):
+                for i in range(2):
+                    Choice.objects.create(question=question, choice_text='c%d' % i)
+
+    def test_cascade_counts(self):
+        bulk_delete = BulkDelete(Author.objects.filter(
+            pk__in=[author.pk for author in self.authors[:4]]), batch_size=3)
+        deleted = bulk_delete.run()
+        self.assertFalse(bulk_delete.fast)
+        self.assertEqual(bulk_delete.batches, 2)
+        self.assertEqual(deleted[Author], 4)
+        self.assertEqual(deleted[Question], 12)
+        self.assertEqual(deleted[Choice], 24)
+        self.assertEqual(Author.objects.count(), 1)
+        self.assertEqual(Choice.objects.count(), 6)
+
+    def test_fast_delete_counts(self):
+        bulk_delete = BulkDelete(Choice.objects.all(), batch_size=7)
+        deleted = bulk_delete.run()
+        self.assertTrue(bulk_delete.fast)
+        self.assertEqual(bulk_delete.batches, 5)
+        self.assertEqual(dict(deleted), {Choice: 30})
+        self.assertFalse(Choice.objects.exists())
+
+
+class CascadeCountsTests(TestCase):
+
+    def setUp(self):
+        self.authors = [Author.objects.create(name='A%d' % i) for i in range(3)]
+        for author in self.authors:
+            for question in create_questions(author, 2):
+                for i in range(3):
+                    Choice.objects.create(question=question, choice_text='c%d' % i)
+
+    def test_counts(self):
+        counts = get_cascade_counts(Author.objects.filter(
+            pk__in=[author.pk for author in self.authors[:2]]))
+        self.assertEqual(list(counts.items()),
+                [(Author, 2), (Question, 4), (Choice, 12)])
+        self.assertEqual(dict(get_cascade_counts(Choice.objects.all())), {Choice: 18})
+        self.assertEqual(dict(get_cascade_counts(Author.objects.none())), {})
+
+    def test_confirmation_page(self):
+        response = self.client.get('/polls/authors/?o=delete&item=%d' % self.authors[0].pk)
+        self.assertEqual(response.status_code, 200)
+        # the author itself is named in the confirmation message
+        self.assertEqual(response.context['delete_counts'],
+                [('Questions', 2), ('choices', 6)])
+        self.assertContains(response, '<li>6 choices</li>', html=True)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class JSONListTests(TestCase):
+
+    def test_sorted_and_searched(self):
+        author = Author.objects.create(name='A')
+        pub_date = timezone.now().replace(microsecond=0)
+        for text in ('apple', 'banana', 'cherry', 'grape', 'papaya'):
+            Question.objects.create(question_text=text, pub_date=pub_date,
+                    author=author)
+        response = self.client.get('/search/', {'q': 'ap', 'sort': '-question_text'},
+                HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('Accept', response['Vary'])
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([column['name'] for column in data['columns']],
+                ['question_text', 'pub_date', 'author'])
+        self.assertEqual([row['values'][0] for row in data['rows']],
+                ['papaya', 'grape', 'apple'])
+        self.assertEqual(data['rows'][0]['values'][2], force_text(author))
+        self.assertTrue(all(row['editable'] and row['deletable'] for row in data['rows']))
+        self.assertEqual((data['pagination']['count'], data['pagination']['next']),
+                (3, None))
+        response = self.client.get('/search/?format=json&q=zzz')
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['rows'], [])
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ExportTests(TestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name='Smith, J.')
+        self.questions = create_questions(author, 5)
+
+    def export(self, **params):
+        params['o'] = 'export'
+        response = self.client.get('/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv(self):
+        response, content = self.export(fmt='csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = content.splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[1], 'q000,"Smith, J."')
+        self.assertEqual(lines[5], 'q004,"Smith, J."')
+        response, content = self.export(fmt='csv', items='%d,%d' % (
+            self.questions[1].pk, self.questions[3].pk))
+        self.assertEqual(content.splitlines()[1:], ['q001,"Smith, J."', 'q003,"Smith, J."'])
+
+    def test_ndjson(self):
+        response, content = self.export(fmt='ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {'question_text': 'q000', 'author__name': 'Smith, J.'})
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ImportTests(TestCase):
+
+    def test_import_csv(self):
+        author = Author.objects.create(name='A')
+        data = ('question_text,pub_date,author\n'
+                'first,2020-01-01 10:00,%d\n'
+                ',2020-01-01 10:00,%d\n'
+                'third,2020-01-02 10:00,%d\n' % (author.pk, author.pk, author.pk))
+        response = self.client.post('/import/?o=import', {
+            'file': SimpleUploadedFile('questions.csv', data.encode('utf-8')),
+            'fmt': 'csv',
+            }, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        report = json.loads(response.content.decode('utf-8'))
+        self.assertEqual((report['rows'], report['created'], report['failed']),
+                (3, 2, 1))
+        self.assertEqual(report['errors'][0]['row'], 2)
+        self.assertIn('question_text', report['errors'][0]['errors'])
+        self.assertEqual(sorted(Question.objects.values_list('question_text',
+            flat=True)), ['first', 'third'])
+
+
+class SortTests(TestCase):
+
+    class View(QuestionCRUDView):
+        list_display = ('question_text', 'pub_date', 'author__name', 'was_published_recently')
+
+    def test_ordering(self):
+        view = make_view(self.View, sort='-author__name,bogus,was_published_recently,question_text')
+        self.assertEqual(view.get_ordering(), ['-author__name', 'question_text', 'pk'])
+        self.assertEqual(view.get_sort_direction('author__name'), 'desc')
+        self.assertEqual(view.get_sort_url('author__name'), '?sort=author__name')
+        self.assertIsNone(view.get_sort_url('was_published_recently'))
+        view = make_view(self.View, sort='-pub_date')
+        self.assertEqual(view.get_ordering(), ['-pub_date', '-pk'])
+        self.assertEqual(view.get_sort_url('pub_date'), '?sort=pub_date')
+        self.assertEqual(make_view(self.View, sort='pub_date').get_sort_url('pub_date'),
+                '?sort=-pub_date')
+
+    def test_sorted_list(self):
+        for name in ('b', 'c', 'a'):
+            author = Author.objects.create(name=name)
+            Question.objects.create(question_text='by ' + name,
+                    pub_date=timezone.now(), author=author)
+        content = self.client.get('/polls/questions/?sort=-question_text').content.decode('utf-8')
+        positions = [content.index('by %s' % name) for name in ('c', 'b', 'a')]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_has_index_for(self):
+        self.assertTrue(has_index_for(Question, 'pk'))
+        self.assertTrue(has_index_for(Question, 'author'))
+        self.assertFalse(has_index_for(Question, 'question_text'))
+        self.assertFalse(has_index_for(Question, 'author__name'))
+
+
+def has_fts5():
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE crud_fts5_probe USING fts5(a)")
+            cursor.execute("DROP TABLE crud_fts5_probe")
+    except Exception:
+        return False
+    return True
+
+
+class FTSSearchTests(TestCase):
+
+    def setUp(self):
+        self.backend = SQLiteFTSSearch()
+        author = Author.objects.create(name='A')
+        pub_date = timezone.now()
+        for text in ('Did you dream last night?', 'What is the last film you saw?',
+                'Do you like to dance?'):
+            Question.objects.create(question_text=text, pub_date=pub_date,
+                    author=author)
+
+    def tearDown(self):
+        self.backend.drop(Question, 'default')
+
+    def search(self, term, fields=('question_text',)):
+        queryset = self.backend.search(Question.objects.order_by('pk'), fields, term)
+        with CaptureQueriesContext(connection) as queries:
+            texts = list(queryset.values_list('question_text', flat=True))
+        return texts, queries.captured_queries[0]['sql']
+
+    def test_icontains_fallback(self):
+        # no index built yet
+        texts, sql = self.search('LAST')
+        self.assertEqual(texts, ['Did you dream last night?',
+            'What is the last film you saw?'])
+        self.assertIn('LIKE', sql)
+        self.assertNotIn('MATCH', sql)
+
+    def test_match(self):
+        if not has_fts5():
+            self.skipTest("SQLite FTS5 is not available")
+        self.backend.build(Question, ['question_text'], 'default')
+        texts, sql = self.search('las')
+        self.assertIn('MATCH', sql)
+        self.assertNotIn('LIKE', sql)
+        # words are matched as prefixes, in any order
+        self.assertEqual(texts, ['Did you dream last night?',
+            'What is the last film you saw?'])
+        self.assertEqual(self.search('film "last"')[0], ['What is the last film you saw?'])
+        # the triggers keep the index in sync
+        question = Question.objects.get(question_text__startswith='Do you like')
+        question.question_text = 'Last dance?'
+        question.save()
+        Question.objects.filter(question_text__startswith='Did').delete()
+        self.assertEqual(self.search('last')[0], ['What is the last film you saw?',
+            'Last dance?'])
+        # fields that are not in the index fall back to icontains
+        texts, sql = self.search('a', fields=('question_text', 'author__name'))
+        self.assertIn('LIKE', sql)
+        self.assertEqual(len(texts), 2)
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ProjectionTests(TestCase):
+
+    def test_only_fields(self):
+        class View(QuestionCRUDView):
+            list_display = ('question_text', 'was_published_recently')
+            list_dependencies = {'__str__': ('question_text',)}
+
+        self.assertEqual(make_view(ProjectedQuestionCRUDView).get_list_only_fields(),
+                ('id', 'question_text', 'author', 'author__name'))
+        # a method column needs the complete rows unless it declares its fields
+        self.assertIsNone(make_view(View).get_list_only_fields())
+        View.list_dependencies = dict(View.list_dependencies,
+                was_published_recently=('pub_date',))
+        view = make_view(View)
+        self.assertEqual(view.get_list_only_fields(), ('id', 'question_text', 'pub_date'))
+        self.assertFalse(view.can_fetch_list_rows())
+
+    def test_values_rows(self):
+        author = Author.objects.create(name='Smith')
+        create_questions(author, 3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/projected/')
+        self.assertEqual(response.status_code, 200)
+        rows = response.context['object_list']
+        self.assertTrue(all(isinstance(row, ListRow) for row in rows))
+        self.assertEqual([row.values for row in rows],
+                [('q000', 'Smith'), ('q001', 'Smith'), ('q002', 'Smith')])
+        self.assertEqual(response.content.decode('utf-8').count('<td>Smith</td>'), 3)
+        selects = [query['sql'] for query in queries.captured_queries
+                if 'FROM "polls_question"' in query['sql'] and 'COUNT' not in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('pub_date', selects[0])
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ConditionalGetTests(TestCase):
+
+    def test_not_modified_until_edited(self):
+        author = Author.objects.create(name='A')
+        question = create_questions(author, 3)[0]
+        response = self.client.get('/conditional/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get('/conditional/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        question.question_text = 'edited'
+        question.save()
+        response = self.client.get('/conditional/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('edited', response.content.decode('utf-8'))
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class SaveFormsetTests(TestCase):
+
+    def test_create_update_delete(self):
+        author = Author.objects.create(name='A', email='')
+        changed, deleted, unchanged = create_questions(author, 3)
+        data = formset_data(author, (changed, deleted, unchanged), extra=1)
+        data['question_set-0-question_text'] = 'changed'
+        data['question_set-1-DELETE'] = 'on'
+        data['question_set-3-question_text'] = 'added'
+        data['question_set-3-pub_date'] = '2020-01-01 10:00:00'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/polls/authors/?o=edit&item=%d' % author.pk, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Question.objects.get(pk=changed.pk).question_text, 'changed')
+        self.assertFalse(Question.objects.filter(pk=deleted.pk).exists())
+        self.assertEqual(Question.objects.get(pk=unchanged.pk).question_text,
+                unchanged.question_text)
+        self.assertEqual(list(Question.objects.filter(question_text='added')
+            .values_list('author', flat=True)), [author.pk])
+        # one statement each for the rows added, changed and deleted
+        for statement in ('INSERT INTO', 'UPDATE', 'DELETE FROM'):
+            self.assertEqual(len([query for query in queries.captured_queries
+                if '%s "polls_question"' % statement in query['sql']]), 1)
+
+
+class UpdateFieldsTests(TestCase):
+
+    def setUp(self):
+        self.question = create_questions(Author.objects.create(name='A'), 1)[0]
+        self.saves = []
+        post_save.connect(self.saved, sender=Question)
+
+    def tearDown(self):
+        post_save.disconnect(self.saved, sender=Question)
+
+    def saved(self, sender, instance, update_fields=None, **kwargs):
+        self.saves.append(set(update_fields) if update_fields is not None else None)
+
+    def edit(self, **values):
+        response = self.client.post('/polls/questions/?o=edit&item=%d' % self.question.pk,
+                question_data(self.question, **values))
+        self.assertEqual(response.status_code, 302)
+
+    def test_changed_columns_only(self):
+        self.edit(question_text='edited')
+        self.assertEqual(self.saves, [set(['question_text'])])
+        self.assertEqual(Question.objects.get(pk=self.question.pk).question_text, 'edited')
+
+    def test_unchanged_not_saved(self):
+        self.edit()
+        self.assertEqual(self.saves, [])
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class PartialUpdateTests(TestCase):
+
+    def setUp(self):
+        self.question = create_questions(Author.objects.create(name='A'), 1)[0]
+        self.path = '/partial/?o=edit&item=%d&partial=1&rowindex=3' % self.question.pk
+
+    def test_fragment(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode('utf-8').strip()
+        self.assertTrue(content.startswith('<div class="crud-partial"'), content[:100])
+        self.assertNotIn('<html', content)
+        self.assertIn('name="question_text"', content)
+
+    def test_edit_returns_row(self):
+        response = self.client.post(self.path, question_data(self.question,
+            question_text='edited'))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['pk'], self.question.pk)
+        self.assertEqual(data['row'].count('<tr data-pk="%d">' % self.question.pk), 1)
+        self.assertIn('edited', data['row'])
+        self.assertIn('id="id_select_3"', data['row'])
+        self.assertTrue(data['message'])
+
+    def test_errors_return_fragment(self):
+        response = self.client.post(self.path, question_data(self.question,
+            question_text=''))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertContains(response, 'crud-partial')
+        self.assertEqual(Question.objects.get(pk=self.question.pk).question_text, 'q000')
+
+    def test_delete_and_refusal(self):
+        readonly = Question.objects.create(question_text='readonly',
+                pub_date=self.question.pub_date)
+        response = self.client.post('/partial/?o=edit&item=%d&partial=1' % readonly.pk,
+                question_data(readonly, question_text='edited'))
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', json.loads(response.content.decode('utf-8')))
+        response = self.client.post('/partial/?o=delete&item=%d&partial=1' % self.question.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['row'], '')
+        self.assertFalse(Question.objects.filter(pk=self.question.pk).exists())
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class RowsFragmentTests(TestCase):
+
+    def test_chunks_follow_next_cursor(self):
+        questions = create_questions(Author.objects.create(name='A'), 10)
+        params = {'o': 'rows', 'sort': '-question_text'}
+        pks, chunks = [], 0
+        with CaptureQueriesContext(connection) as queries:
+            while chunks < 5:
+                response = self.client.get('/infinite/', params)
+                self.assertEqual(response.status_code, 200)
+                content = response.content.decode('utf-8')
+                pks.extend(int(pk) for pk in re.findall(r'<tr data-pk="(\d+)"', content))
+                chunks += 1
+                if not response.has_header('X-Next-Cursor'):
+                    break
+                params['after'] = response['X-Next-Cursor']
+        self.assertEqual(chunks, 3)
+        self.assertEqual(pks, [question.pk for question in reversed(questions)])
+        self.assertFalse([query for query in queries.captured_queries
+            if 'COUNT(' in query['sql']])
+
+
+@override_settings(ROOT_URLCONF='polls.tests')
+class ServerTimingTests(TestCase):
+
+    def setUp(self):
+        create_questions(Author.objects.create(name='A'), 5)
+        self.timed = []
+        request_timed.connect(self.record)
+
+    def tearDown(self):
+        request_timed.disconnect(self.record)
+
+    def record(self, sender, timings, **kwargs):
+        self.timed.append(timings)
+
+    def test_queries_counted(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/timing/')
+        self.assertEqual(response.status_code, 200)
+        metrics = dict(metric.split(';', 1)[0:2] for metric in
+                response['Server-Timing'].split(', '))
+        self.assertEqual(set(['db', 'queryset', 'context', 'rows', 'render', 'total']),
+                set(metrics))
+        self.assertIn('desc="%d queries"' % len(queries.captured_queries), metrics['db'])
+        self.assertIn('desc="5 rows"', metrics['rows'])
+        timings, = self.timed
+        self.assertEqual(timings.queries, len(queries.captured_queries))
+        self.assertGreater(timings.db_time, 0)
+        self.assertEqual(timings.rows, 5)
+
+    def test_query_log_left_alone(self):
+        log = connection.queries_log
+        self.client.get('/timing/')
+        self.assertTrue(self.timed[0].queries)
+        # counted without logging the queries, and the connection restored
+        self.assertIs(connection.queries_log, log)
+        self.assertEqual(len(log), 0)
+        self.assertNotIn('make_cursor', connection.__dict__)
+        self.assertNotIn('make_debug_cursor', connection.__dict__)
@@ -18,9 +18,12 @@ setup(
     author='Hari Mahadevan',
     author_email='hari@hari.xyz',
     url='https://www.github.com/harikvpy/crud/',
-    packages=[
-        'singleurlcrud',
-        ],
+    packages=find_packages(exclude=[
+        'crud',
+        'crud.*',
+        'polls',
+        'polls.*',
+        ]),
     include_package_data=True,
     install_requires=[
         'django-pure-pagination',
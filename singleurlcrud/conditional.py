@@ -0,0 +1,120 @@
+"""
+Conditional GET support for CRUDView.
+
+When enabled (CRUDView.conditional_get = True), list and edit pages are sent
+with an ETag (and, where known, a Last-Modified) header and a request that
+presents a matching If-None-Match (or If-Modified-Since) is answered with
+304 Not Modified before the page is rendered.
+
+The validator of a list page is built from the change stamps of the list's
+model and of the related models its columns display, along with the
+querystring, the user and the language. A model's change stamp is kept in
+Django's cache and replaced whenever a row of the model is saved or deleted
+(through post_save/post_delete signals and after every POST to the view,
+which covers the bulk operations that bypass the signals). The validator of
+an edit page is built from the row's version -- the view's
+row_version_field or a hash of the row's field values -- and the change
+stamps of the models that the form's choices come from.
+
+Changes that bypass the signals (QuerySet.update(), raw SQL or another
+process that does not serve the view, with a cache shared between processes)
+are not detected; call ChangeStamps.touch() for the model after making them.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag
+
+
+class ChangeStamps(object):
+    """
+    Per model change stamps. A stamp is the time of the model's last change
+    followed by a random token, so that it changes even if two changes
+    happen at the same time.
+    """
+    key_prefix = 'singleurlcrud:stamp'
+    _lock = threading.Lock()
+    _receivers = {}
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, model):
+        return '%s:%s.%s' % (self.key_prefix, model._meta.app_label,
+                model._meta.model_name)
+
+    def _new_stamp(self):
+        return '%.6f:%s' % (time.time(), uuid.uuid4().hex[:8])
+
+    def get_many(self, models):
+        """
+        Returns the list of the change stamps of models. Models that have no
+        stamp yet are given one.
+        """
+        keys = [self._key(model) for model in models]
+        stamps = self.cache.get_many(keys)
+        for key in keys:
+            if key not in stamps:
+                self.cache.add(key, self._new_stamp(), None)
+                stamps[key] = self.cache.get(key)
+        return [stamps[key] for key in keys]
+
+    def last_modified(self, stamps):
+        """
+        Returns the time of the latest of the change stamps as a timestamp.
+        """
+        return max([float(stamp.split(':', 1)[0]) for stamp in stamps if stamp] or
+                [None])
+
+    def touch(self, model):
+        """
+        Replaces the change stamp of model.
+        """
+        self.cache.set(self._key(model), self._new_stamp(), None)
+
+    def connect_signals(self, models):
+        """
+        Connects post_save & post_delete signal handlers that touch the
+        change stamp of each of models whenever its rows are saved or
+        deleted. Connecting is idempotent.
+        """
+        alias = self.alias
+        for model in models:
+            uid = '%s:%s' % (self._key(model), alias)
+            if uid in self._receivers:
+                continue
+
+            def receiver(sender, **kwargs):
+                ChangeStamps(alias).touch(sender)
+            with self._lock:
+                if uid not in self._receivers:
+                    self._receivers[uid] = receiver
+                    post_save.connect(receiver, sender=model, weak=False,
+                            dispatch_uid=uid)
+                    post_delete.connect(receiver, sender=model, weak=False,
+                            dispatch_uid=uid)
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Returns a boolean indicating if the request's If-None-Match or, in its
+    absence, If-Modified-Since header matches the validators. etag is the
+    unquoted entity tag and last_modified a timestamp or None.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags or quote_etag(etag) in etags
+    if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if if_modified_since and last_modified is not None:
+        if_modified_since = parse_http_date_safe(if_modified_since)
+        return if_modified_since is not None and \
+                int(last_modified) <= if_modified_since
+    return False
@@ -0,0 +1,175 @@
+"""
+Batched deletion of the rows selected for CRUDView's delete_multiple.
+
+Deleting a queryset in one shot has Django's deletion collector load every
+row to be deleted, along with the rows that cascade from them, into memory
+and delete them all in a single transaction. For large selections that takes
+a lot of memory and holds the database locks for the whole duration.
+
+BulkDelete deletes the rows a batch of primary keys at a time instead, each
+batch in its own transaction, so that memory use and lock duration are
+bounded by the batch size. Rows whose deletion does not require any Python
+(no delete signal receivers, cascades or generic relations) are deleted with
+a single DELETE query per batch without being loaded at all.
+
+Since each batch is committed separately, a failure midway leaves the batches
+that were already deleted deleted.
+
+get_cascade_counts() works out the number of rows that deleting a queryset
+would delete, for the delete confirmation page, with COUNT queries instead
+of collecting the rows.
+"""
+from collections import OrderedDict
+
+import django
+from django.apps import apps
+from django.db import transaction
+from django.db.models.deletion import CASCADE, Collector, \
+        get_candidate_relations_to_delete
+
+# Collector.delete() returns the number of rows deleted per model, including
+# the fast deleted cascades, from Django 1.9 on
+COLLECTOR_RETURNS_COUNTS = django.VERSION >= (1, 9)
+
+
+def get_cascade_counts(queryset, max_depth=5):
+    """
+    Returns an OrderedDict of the number of rows, indexed by the model, that
+    deleting the rows of queryset would delete. The queryset's own model
+    comes first.
+
+    Counts are determined by following the ON DELETE CASCADE relations from
+    the queryset's model, max_depth levels deep, with a COUNT query for each
+    relation, which selects the related rows through a subquery of the rows
+    of the previous level. Relations that lead to no rows are not followed
+    further. Rows that can be reached through more than one relation are
+    counted once for each, so the counts are an upper bound. Rows of
+    auto-created models (ManyToManyField through tables) are deleted but not
+    counted.
+    """
+    counts = OrderedDict()
+    using = queryset.db
+
+    def collect(model, queryset, depth):
+        count = queryset.count()
+        if not count:
+            return
+        if not model._meta.auto_created:
+            counts[model] = counts.get(model, 0) + count
+        if depth >= max_depth:
+            return
+        for related in get_candidate_relations_to_delete(model._meta):
+            field = related.field
+            remote_field = getattr(field, 'remote_field', None) or field.rel
+            if remote_field.on_delete is not CASCADE:
+                continue
+            target = field.foreign_related_fields[0].name
+            related_model = related.related_model
+            collect(related_model,
+                    related_model._base_manager.using(using).filter(**{
+                        '%s__in' % field.name: queryset.values(target)}),
+                    depth+1)
+
+    collect(queryset.model, queryset.order_by(), 0)
+    return counts
+
+
+class BulkDelete(object):
+    """
+    Deletes the rows of a queryset in batches of primary keys.
+
+    Parameters:
+        queryset - the rows to be deleted
+        batch_size - number of rows deleted in each transaction
+        progress - an optional callable, called with the BulkDelete object
+                   after each batch is deleted
+
+    Once run() returns, 'deleted' holds the number of rows deleted for each
+    model (including the cascaded ones) and 'fast' indicates if the raw
+    DELETE path was taken.
+    """
+    def __init__(self, queryset, batch_size=500, progress=None):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.using = queryset.db
+        self.batch_size = batch_size
+        self.progress = progress
+        self.fast = False
+        self.total = 0
+        self.batches = 0
+        self.deleted = OrderedDict()
+
+    @property
+    def rows_deleted(self):
+        """
+        Number of rows of the queryset's model deleted so far.
+        """
+        return self.deleted.get(self.model, 0)
+
+    def can_fast_delete(self):
+        """
+        Returns a boolean indicating if the rows can be deleted with raw
+        DELETE queries, which is the case if deleting them does not
+        involve signals or cascades.
+        """
+        return Collector(using=self.using).can_fast_delete(
+                self.model._base_manager.using(self.using).all())
+
+    def get_batches(self):
+        """
+        Generator that yields the primary keys of the rows to be deleted,
+        batch_size at a time, in ascending order. Each batch is fetched
+        after the previous one is deleted, seeking past its last key.
+        """
+        queryset = self.queryset.order_by('pk').values_list('pk', flat=True)
+        last = None
+        while True:
+            batch = queryset if last is None else queryset.filter(pk__gt=last)
+            pks = list(batch[:self.batch_size])
+            if not pks:
+                break
+            yield pks
+            last = pks[-1]
+
+    def delete_batch(self, pks):
+        """
+        Deletes the rows with the primary keys pks in a transaction and
+        returns the number of rows deleted for each model as a dictionary.
+        """
+        batch = self.model._base_manager.using(self.using).filter(pk__in=pks)
+        with transaction.atomic(using=self.using):
+            if self.fast:
+                count = batch._raw_delete(self.using)
+                # _raw_delete() returns None on Django < 1.9
+                return {self.model: len(pks) if count is None else count}
+            collector = Collector(using=self.using)
+            collector.collect(batch)
+            counts = dict([(model, len(instances))
+                for model, instances in collector.data.items()])
+            if not COLLECTOR_RETURNS_COUNTS:
+                # the fast deleted cascades are not in collector.data, count
+                # them while they're still there
+                for queryset in collector.fast_deletes:
+                    counts[queryset.model] = counts.get(queryset.model, 0) + \
+                            queryset.count()
+            result = collector.delete()
+        if result is not None:
+            # indexed by the model's label
+            counts = dict([(apps.get_model(label), count)
+                for label, count in result[1].items()])
+        return counts
+
+    def run(self):
+        """
+        Deletes all the rows and returns the 'deleted' summary.
+        """
+        self.fast = self.can_fast_delete()
+        self.total = self.queryset.count()
+        self.deleted[self.model] = 0
+        for pks in self.get_batches():
+            for model, count in self.delete_batch(pks).items():
+                self.deleted[model] = self.deleted.get(model, 0) + count
+            self.batches += 1
+            if self.progress:
+                self.progress(self)
+        return self.deleted
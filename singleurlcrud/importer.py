@@ -0,0 +1,184 @@
+"""
+Bulk import of rows into a model for CRUDView's import operation.
+
+Rows are read from the uploaded CSV or NDJSON file as a stream, a line at a
+time, so the file does not have to fit in memory. Each row is validated with
+the view's add form and the valid rows are created with bulk_create(), a
+batch at a time, each batch in its own transaction.
+
+Since rows are created with bulk_create(), model save() methods are not
+called, pre_save/post_save signals are not sent and ManyToManyField values
+are not saved.
+"""
+import csv
+import json
+import time
+
+from django.db import transaction, DatabaseError
+from django.utils import six
+from django.utils.encoding import force_text
+
+
+def iter_upload_lines(upload):
+    """
+    Generator that yields the lines of the uploaded file as text, decoded
+    from UTF-8. A leading byte order mark is dropped.
+    """
+    first = True
+    for line in upload:
+        line = force_text(line, 'utf-8')
+        if first:
+            line = line.lstrip(u'\ufeff')
+            first = False
+        yield line
+
+
+def iter_csv_rows(upload):
+    """
+    Generator that yields the rows of an uploaded CSV file as dictionaries,
+    indexed by the column names in the file's header row.
+    """
+    lines = iter_upload_lines(upload)
+    if six.PY2:
+        # Python 2 csv module does not support unicode
+        lines = (line.encode('utf-8') for line in lines)
+    reader = csv.reader(lines)
+    header = None
+    for values in reader:
+        if six.PY2:
+            values = [value.decode('utf-8') for value in values]
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        if not any(values):
+            continue
+        yield dict(zip(header, values))
+
+
+def iter_ndjson_rows(upload):
+    """
+    Generator that yields the rows of an uploaded NDJSON file, one JSON
+    object per line, as dictionaries. Raises ValueError for a line that's
+    not a JSON object.
+    """
+    for number, line in enumerate(iter_upload_lines(upload), 1):
+        line = line.strip()
+        if not line:
+            continue
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("Line %d is not a JSON object" % number)
+        yield row
+
+
+IMPORT_FORMATS = {
+        'csv': iter_csv_rows,
+        'ndjson': iter_ndjson_rows,
+        }
+
+
+class BulkImport(object):
+    """
+    Validates rows with a ModelForm and creates the valid ones in batches.
+
+    Parameters:
+        form_class - the ModelForm class that each row is validated with
+        batch_size - number of rows created by each bulk_create(), each in
+                     its own transaction
+        max_errors - maximum number of row errors recorded; rows are still
+                     validated and counted after the limit is reached
+        fields - optional dictionary that maps the row keys to the form's
+                     field names
+        get_form - optional callable, such as CRUDView.get_form(), that
+                     returns the form of a row given form_class and the
+                     form's keyword arguments; defaults to form_class(**kwargs)
+
+    After run() returns, the report is available in the attributes:
+        rows - number of rows read
+        created - number of rows created
+        failed - number of rows that were not created
+        errors - list of (row number, {field: [messages]}) for the rows that
+                 failed, in the order they were read; errors that are not
+                 specific to a field are under the key '__all__'
+        elapsed - duration of the import in seconds
+    """
+    def __init__(self, form_class, batch_size=500, max_errors=1000, fields=None,
+            get_form=None):
+        self.form_class = form_class
+        self.get_form = get_form or (lambda form_class, **kwargs:
+                form_class(**kwargs))
+        self.model = form_class._meta.model
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.fields = fields or {}
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.elapsed = 0
+
+    @property
+    def rows_per_second(self):
+        return float(self.rows) / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((number, errors))
+
+    def get_form_data(self, row):
+        """
+        Returns the form data for the row, with the row keys mapped to the
+        form's field names.
+        """
+        data = {}
+        for key, value in row.items():
+            if value is None:
+                value = u''
+            elif isinstance(value, bool):
+                value = u'on' if value else u''
+            data[self.fields.get(key, key)] = value
+        return data
+
+    def create_batch(self, batch):
+        """
+        Creates the objects of batch, a list of (row number, object), in a
+        transaction. If the batch fails, none of its rows are created and
+        each is reported with the database error.
+        """
+        try:
+            with transaction.atomic(using=self.model._default_manager.db):
+                self.model._default_manager.bulk_create(
+                        [obj for number, obj in batch])
+            self.created += len(batch)
+        except DatabaseError as e:
+            for number, obj in batch:
+                self.add_error(number, {'__all__': [force_text(e)]})
+
+    def run(self, rows):
+        """
+        Imports the rows, an iterable of dictionaries, and returns self.
+        Errors reading the rows (a malformed file) are raised after the
+        valid rows read until then have been created.
+        """
+        started = time.time()
+        batch = []
+        try:
+            for number, row in enumerate(rows, 1):
+                self.rows += 1
+                form = self.get_form(self.form_class,
+                        data=self.get_form_data(row))
+                if not form.is_valid():
+                    self.add_error(number, dict([(field, [force_text(message)
+                        for message in messages])
+                        for field, messages in form.errors.items()]))
+                    continue
+                batch.append((number, form.save(commit=False)))
+                if len(batch) == self.batch_size:
+                    self.create_batch(batch)
+                    batch = []
+        finally:
+            if batch:
+                self.create_batch(batch)
+            self.elapsed = time.time() - started
+        return self
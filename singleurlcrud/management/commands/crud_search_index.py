@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import get_resolver
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router
+from django.utils.module_loading import import_string
+
+from singleurlcrud.search import SQLiteFTSSearch
+from singleurlcrud.views import CRUDView
+
+
+def iter_url_views(patterns):
+    """
+    Generator that yields the class based views of the url patterns,
+    including those of the included urlconfs.
+    """
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            for view_class in iter_url_views(pattern.url_patterns):
+                yield view_class
+        else:
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+class Command(BaseCommand):
+    help = "Builds (or rebuilds) the SQLite full text search indexes of the " \
+            "CRUDViews that use the 'sqlite_fts' search backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('views',
+                nargs='*',
+                help="Dotted paths of the CRUDView classes to index, defaults "
+                     "to all the CRUDViews in the urlconf")
+
+        parser.add_argument('--drop',
+                dest='drop',
+                action='store_true',
+                default=False,
+                help="Drop the indexes and their triggers instead")
+
+    def get_views(self, paths):
+        if paths:
+            try:
+                return [import_string(path) for path in paths]
+            except ImportError as e:
+                raise CommandError(str(e))
+        views = []
+        for view_class in iter_url_views(get_resolver(None).url_patterns):
+            if view_class not in views:
+                views.append(view_class)
+        return views
+
+    def handle(self, *args, **options):
+        indexed = set()
+        for view_class in self.get_views(options['views']):
+            if not isinstance(view_class, type) or \
+                    not issubclass(view_class, CRUDView):
+                continue
+            backend = view_class().get_search_backend()
+            if not isinstance(backend, SQLiteFTSSearch):
+                continue
+            model = view_class.model
+            using = router.db_for_write(model)
+            if (using, model) in indexed:
+                continue
+            indexed.add((using, model))
+            if connections[using].vendor != 'sqlite':
+                self.stderr.write("Skipped %s, database '%s' is not SQLite" % (
+                    view_class.__name__, using))
+                continue
+            if options['drop']:
+                backend.drop(model, using)
+                self.stdout.write("Dropped index %s" % backend.get_index_name(model))
+            else:
+                try:
+                    backend.build(model, view_class.search_fields, using)
+                except ImproperlyConfigured as e:
+                    raise CommandError(str(e))
+                self.stdout.write("Built index %s on %s" % (
+                    backend.get_index_name(model),
+                    ', '.join(view_class.search_fields)))
@@ -0,0 +1,374 @@
+"""
+Keyset (seek) pagination for CRUDView.
+
+The default pagination (through django-pure-pagination) pages the list using
+OFFSET/LIMIT, which requires the database to skip all the rows preceding the
+requested page. That gets progressively slower the deeper the page is.
+
+Keyset pagination remembers the ordering key of the last (or first) row of
+the current page and fetches the next (or previous) page as the rows that
+come after (or before) that key. With an index on the ordering columns, the
+cost of fetching a page is the same regardless of its depth. The trade-off is
+that pages cannot be addressed by their number, only next & previous pages
+are available.
+
+The key of the boundary row is passed around as an opaque cursor in the
+querystring.
+
+This module also defines the count strategies for the numbered (offset)
+paginator. Rendering page numbers requires the total number of rows, which
+is a full COUNT(*) on every request by default. Count strategies allow this
+to be cached or estimated from database statistics instead.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:
+    # Django < 1.11
+    from django.db.models.sql.datastructures import EmptyResultSet
+from django.core.paginator import InvalidPage
+from django.db import connections, DatabaseError
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import six
+from django.utils.encoding import force_bytes, force_text
+
+from pure_pagination.paginator import Paginator
+
+
+def get_keyset_ordering(queryset):
+    """
+    Returns the ordering of the queryset as a list of 2-tuples,
+    (field, descending), with the primary key appended as the tie-breaker
+    (unless the ordering already ends with it).
+
+    Ordering is taken from the queryset's order_by() or, failing that, from
+    the model's Meta.ordering. Only local, non-nullable fields can be used for
+    keyset pagination.
+    """
+    opts = queryset.model._meta
+    ordering = list(queryset.query.order_by) or list(opts.ordering)
+    keys = []
+    for name in ordering:
+        if not isinstance(name, six.string_types) or name == '?' or \
+                LOOKUP_SEP in name:
+            raise ImproperlyConfigured(
+                "Keyset pagination requires ordering by local fields of %s, "
+                "'%s' is not supported" % (opts.object_name, name))
+        descending = name.startswith('-')
+        name = name.lstrip('-+')
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        if field.null:
+            raise ImproperlyConfigured(
+                "Keyset pagination cannot order by the nullable field %s.%s" %
+                (opts.object_name, field.name))
+        keys.append((field, descending))
+    if not keys or keys[-1][0] != opts.pk:
+        keys.append((opts.pk, keys[-1][1] if keys else False))
+    return keys
+
+
+class KeysetPaginator(object):
+    """
+    Paginator that pages through a queryset using keyset (seek) pagination.
+
+    Parameters:
+        queryset - the queryset to paginate
+        per_page - number of rows in a page
+        request - the request, which is used to build the querystrings for
+                  next & previous pages preserving the other GET arguments
+        cursor_kwarg - the name of the querystring argument that holds
+                  the cursor
+    """
+    def __init__(self, queryset, per_page, request=None, cursor_kwarg='cursor'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.request = request
+        self.cursor_kwarg = cursor_kwarg
+        self.keys = get_keyset_ordering(queryset)
+
+    def encode_cursor(self, obj, backwards=False):
+        """
+        Returns the opaque cursor for the ordering key of obj.
+        """
+        # value_to_string() keeps the full precision of the values (for eg.,
+        # datetime microseconds), which an exact keyset match depends on.
+        values = [field.value_to_string(obj) for field, _ in self.keys]
+        data = json.dumps({'v': values, 'b': backwards}, separators=(',', ':'))
+        return force_text(base64.urlsafe_b64encode(force_bytes(data))).rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Returns the 2-tuple (values, backwards) decoded from cursor. Raises
+        InvalidPage if the cursor is malformed.
+        """
+        try:
+            cursor = force_bytes(cursor)
+            data = base64.urlsafe_b64decode(cursor + b'=' * (-len(cursor) % 4))
+            data = json.loads(force_text(data))
+            values = [field.to_python(value) for (field, _), value in
+                    zip(self.keys, data['v'])]
+            if len(values) != len(self.keys):
+                raise ValueError("cursor does not match the ordering")
+            return values, bool(data.get('b'))
+        except Exception as e:
+            raise InvalidPage("Invalid cursor: %s" % e)
+
+    def get_seek_filter(self, values, backwards):
+        """
+        Returns the Q object that selects the rows that come after (or
+        before, if backwards is True) the key values in ordering sequence.
+
+        For ordering (a, b, pk) this is the expansion of the row value
+        comparison (a, b, pk) > (x, y, z):
+            a > x OR (a = x AND b > y) OR (a = x AND b = y AND pk > z)
+        with each comparison reversed for descending fields.
+        """
+        seek = Q()
+        for index, (field, descending) in enumerate(self.keys):
+            lookup = 'gt' if descending == backwards else 'lt'
+            condition = Q(**{'%s__%s' % (field.attname, lookup): values[index]})
+            for prev_index, (prev_field, _) in enumerate(self.keys[:index]):
+                condition &= Q(**{prev_field.attname: values[prev_index]})
+            seek |= condition
+        return seek
+
+    def get_order_by(self, backwards=False):
+        order_by = []
+        for field, descending in self.keys:
+            if descending != backwards:
+                order_by.append('-' + field.attname)
+            else:
+                order_by.append(field.attname)
+        return order_by
+
+    def page(self, cursor=None):
+        """
+        Returns the KeysetPage for the cursor. If cursor is None, the first
+        page is returned.
+        """
+        queryset = self.queryset
+        backwards = False
+        if cursor:
+            values, backwards = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.get_seek_filter(values, backwards))
+        queryset = queryset.order_by(*self.get_order_by(backwards))
+        rows = list(queryset[:self.per_page+1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+        return KeysetPage(rows, self, has_next=has_more,
+                has_previous=bool(cursor))
+
+    def _querystring(self, cursor):
+        if self.request is not None:
+            query = self.request.GET.copy()
+        else:
+            from django.http import QueryDict
+            query = QueryDict('', mutable=True)
+        query.pop('page', None)
+        query[self.cursor_kwarg] = cursor
+        return query.urlencode()
+
+
+class KeysetPage(object):
+    """
+    A page of rows returned by KeysetPaginator.
+
+    Unlike the numbered pages of a regular paginator, a keyset page only
+    knows if there are pages before and after it and the querystrings to get
+    to them.
+    """
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and len(object_list) > 0
+        self._has_previous = has_previous and len(object_list) > 0
+
+    def __repr__(self):
+        return '<KeysetPage of %d rows>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], True)
+
+    def next_page_querystring(self):
+        if not self.has_next():
+            return None
+        return self.paginator._querystring(self.next_cursor())
+
+    def previous_page_querystring(self):
+        if not self.has_previous():
+            return None
+        return self.paginator._querystring(self.previous_cursor())
+
+
+class ExactCount(object):
+    """
+    Count strategy that counts the rows with a COUNT(*) query every time.
+
+    Count strategies implement count(queryset), which returns a 2-tuple
+    (count, approximate), and invalidate(model), which is called whenever
+    rows of model are added or deleted through the view.
+    """
+    def count(self, queryset):
+        return queryset.count(), False
+
+    def invalidate(self, model):
+        pass
+
+
+class CachedCount(ExactCount):
+    """
+    Count strategy that caches the exact count in Django's cache for
+    'timeout' seconds.
+
+    Counts are cached per model and query (so differently filtered lists have
+    their own count) and all the cached counts of a model are invalidated
+    together by bumping the model's generation number.
+    """
+    key_prefix = 'singleurlcrud:count'
+
+    def __init__(self, timeout=60, cache=cache):
+        self.timeout = timeout
+        self.cache = cache
+
+    def _model_key(self, model):
+        return '%s:%s.%s' % (self.key_prefix, model._meta.app_label,
+                model._meta.model_name)
+
+    def _generation_key(self, model):
+        return '%s:gen' % self._model_key(model)
+
+    def _count_key(self, queryset):
+        model = queryset.model
+        generation = self.cache.get(self._generation_key(model), 0)
+        digest = hashlib.md5(force_bytes(six.text_type(queryset.query))).hexdigest()
+        return '%s:%s:%s' % (self._model_key(model), generation, digest)
+
+    def count(self, queryset):
+        try:
+            key = self._count_key(queryset)
+        except EmptyResultSet:
+            # the query can't match any rows (for eg., pk__in=[])
+            return 0, False
+        count = self.cache.get(key)
+        if count is None:
+            count = queryset.count()
+            self.cache.set(key, count, self.timeout)
+        return count, False
+
+    def invalidate(self, model):
+        key = self._generation_key(model)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # no generation yet, any cached counts are from generation 0
+            self.cache.set(key, 1, None)
+
+
+class EstimatedCount(ExactCount):
+    """
+    Count strategy that returns the number of rows in the table as recorded
+    in the database statistics, avoiding the COUNT(*) altogether.
+
+    Estimates are only meaningful for the whole table, so filtered querysets
+    are counted exactly. Exact count is also used if the database backend is
+    not supported or has no statistics for the table (for eg., ANALYZE was
+    never run).
+
+    To support another backend, derive from this class and implement the
+    method estimate_<vendor>(cursor, table), where vendor is the backend's
+    connection.vendor.
+    """
+    def count(self, queryset):
+        query = queryset.query
+        if not query.where and not query.distinct and \
+                query.low_mark == 0 and query.high_mark is None:
+            estimate = self.estimate(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate, True
+        return super(EstimatedCount, self).count(queryset)
+
+    def estimate(self, model, using):
+        """
+        Returns the estimated number of rows in model's table or None if
+        no estimate is available.
+        """
+        connection = connections[using]
+        method = getattr(self, 'estimate_%s' % connection.vendor, None)
+        if method is None:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                return method(cursor, model._meta.db_table)
+        except DatabaseError:
+            return None
+
+    def estimate_sqlite(self, cursor, table):
+        # The first integer in the stat column is the number of rows in the
+        # table (or the index, which amounts to the same). sqlite_stat1 is
+        # created & populated by ANALYZE.
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+        row = cursor.fetchone()
+        return int(row[0].split()[0]) if row else None
+
+    def estimate_postgresql(self, cursor, table):
+        cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s",
+                [table])
+        row = cursor.fetchone()
+        return int(row[0]) if row and row[0] >= 0 else None
+
+
+COUNT_STRATEGIES = {
+        'exact': ExactCount,
+        'cached': CachedCount,
+        'estimated': EstimatedCount,
+        }
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    pure_pagination Paginator that gets the total row count from a count
+    strategy. count_is_approximate indicates if the count is an estimate.
+    """
+    def __init__(self, object_list, per_page, count_strategy=None, **kwargs):
+        super(CountStrategyPaginator, self).__init__(object_list, per_page,
+                **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.count_is_approximate = False
+
+    def _get_count(self):
+        if self._count is None:
+            if hasattr(self.object_list, 'query'):
+                self._count, self.count_is_approximate = \
+                        self.count_strategy.count(self.object_list)
+            else:
+                self._count = len(self.object_list)
+        return self._count
+    count = property(_get_count)
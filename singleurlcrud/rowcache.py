@@ -0,0 +1,181 @@
+"""
+Cache of rendered list view rows.
+
+Most rows of a list do not change between requests, yet every request renders
+every row. When enabled (CRUDView.row_cache = True), the HTML of each rendered
+row is stored in Django's cache framework and reused for as long as nothing
+that went into rendering it has changed.
+
+A row's cache key is derived from:
+    1. the model and the row's primary key
+    2. the row's generation, which is bumped whenever the row is saved or
+       deleted (through post_save/post_delete signals and CRUDView's own
+       edit/delete handlers), and the model's generation, which is bumped
+       whenever a row of a related model that the list columns display
+       is saved or deleted
+    3. the row's version, which is the value of the view's
+       row_version_field (for eg., an auto_now 'updated' field) or else a
+       hash of the row's field values
+    4. the view's column plan, item template, language & timezone
+    5. the permission flags that control the row's action links
+
+Size of the cache is bounded by the cache backend (use a dedicated cache
+alias with MAX_ENTRIES, through CRUDView.row_cache_alias, to control it)
+and by max_fragment_size, beyond which rendered rows are not cached.
+"""
+import hashlib
+import threading
+import uuid
+
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.utils.encoding import force_bytes
+
+
+class RowCache(object):
+    """
+    Rendered row fragment cache.
+
+    Hits and misses are counted per instance (which CRUDView creates once
+    per request) as well as for the whole process in the class attributes
+    total_hits & total_misses.
+    """
+    key_prefix = 'singleurlcrud:row'
+    total_hits = 0
+    total_misses = 0
+    _lock = threading.Lock()
+    _receivers = {}
+
+    def __init__(self, alias='default', timeout=300, max_fragment_size=65536):
+        self.alias = alias
+        self.timeout = timeout
+        self.max_fragment_size = max_fragment_size
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @classmethod
+    def stats(cls):
+        """
+        Returns the process wide hit & miss counts as a dictionary.
+        """
+        return {'hits': cls.total_hits, 'misses': cls.total_misses}
+
+    def _model_key(self, model):
+        return '%s:%s.%s' % (self.key_prefix, model._meta.app_label,
+                model._meta.model_name)
+
+    def _generation_key(self, model, pk=None):
+        if pk is None:
+            return '%s:gen' % self._model_key(model)
+        return '%s:%s:gen' % (self._model_key(model), pk)
+
+    def get_versions(self, objects, version_field=None):
+        """
+        Returns a list of the version tokens of objects, which is either the
+        value of version_field or a hash of the object's loaded field values.
+        """
+        if version_field:
+            return [getattr(obj, version_field) for obj in objects]
+        versions = []
+        for obj in objects:
+            if hasattr(obj, '_meta'):
+                fields = obj._meta.concrete_fields
+                values = [obj.__dict__.get(field.attname) for field in fields]
+            else:
+                # a row fetched with values_list() (see views.ListRow)
+                values = list(obj.values)
+            versions.append(hashlib.md5(force_bytes(repr(values))).hexdigest())
+        return versions
+
+    def get_keys(self, model, objects, signatures, version_field=None):
+        """
+        Returns the cache keys of the rendered objects. signatures is a list,
+        parallel to objects, of the strings that capture the state, other
+        than the row itself, that the rendering of the object depends on.
+        """
+        model_generation_key = self._generation_key(model)
+        generations = self.cache.get_many([model_generation_key] +
+                [self._generation_key(model, obj.pk) for obj in objects])
+        model_generation = generations.get(model_generation_key, '0')
+        versions = self.get_versions(objects, version_field)
+        keys = []
+        for obj, version, signature in zip(objects, versions, signatures):
+            generation = generations.get(self._generation_key(model, obj.pk), '0')
+            digest = hashlib.md5(force_bytes(u'%s|%s|%s|%s' % (model_generation,
+                generation, version, signature))).hexdigest()
+            keys.append('%s:%s:%s' % (self._model_key(model), obj.pk, digest))
+        return keys
+
+    def get_many(self, keys):
+        """
+        Returns the cached fragments for keys as a dictionary and updates the
+        hit & miss counts.
+        """
+        fragments = self.cache.get_many(keys)
+        hits = len(fragments)
+        misses = len(keys) - hits
+        self.hits += hits
+        self.misses += misses
+        with self._lock:
+            RowCache.total_hits += hits
+            RowCache.total_misses += misses
+        return fragments
+
+    def set_many(self, fragments):
+        """
+        Caches the rendered fragments, a dictionary indexed by their keys.
+        Fragments larger than max_fragment_size are not cached.
+        """
+        fragments = dict([(key, fragment) for key, fragment in fragments.items()
+            if len(fragment) <= self.max_fragment_size])
+        if fragments:
+            self.cache.set_many(fragments, self.timeout)
+
+    def invalidate(self, model, pks):
+        """
+        Invalidates the cached fragments of the rows of model with the given
+        primary keys by moving them to a new generation.
+        """
+        self.cache.set_many(dict([(self._generation_key(model, pk),
+            uuid.uuid4().hex) for pk in pks]), None)
+
+    def invalidate_all(self, model):
+        """
+        Invalidates the cached fragments of all the rows of model.
+        """
+        self.cache.set(self._generation_key(model), uuid.uuid4().hex, None)
+
+    def connect_signals(self, model, dependencies=()):
+        """
+        Connects post_save & post_delete signal handlers that invalidate the
+        cached fragments of model's rows whenever they're saved or deleted.
+        Saving or deleting a row of any of the models in dependencies
+        invalidates all of model's rows. Connecting is idempotent.
+        """
+        alias = self.alias
+
+        def row_receiver(sender, instance, **kwargs):
+            RowCache(alias).invalidate(sender, [instance.pk])
+        self._connect(model, model, row_receiver)
+
+        for dependency in dependencies:
+            def model_receiver(sender, instance, **kwargs):
+                RowCache(alias).invalidate_all(model)
+            self._connect(model, dependency, model_receiver)
+
+    def _connect(self, model, sender, receiver):
+        uid = '%s:%s:%s' % (self._model_key(model), self._model_key(sender),
+                self.alias)
+        if uid in self._receivers:
+            return
+        with self._lock:
+            if uid not in self._receivers:
+                self._receivers[uid] = receiver
+                post_save.connect(receiver, sender=sender, weak=False,
+                        dispatch_uid=uid)
+                post_delete.connect(receiver, sender=sender, weak=False,
+                        dispatch_uid=uid)
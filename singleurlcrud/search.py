@@ -0,0 +1,317 @@
+"""
+Search and filtering of CRUDView's list.
+
+The list is searched for the term in the search GET argument ('q') through a
+search backend. Search backends implement search(queryset, fields, term),
+which returns queryset filtered to the rows where every word of term is
+found in at least one of the fields.
+
+IContainsSearch, the default backend, matches the words with icontains
+lookups (LIKE '%word%'), which works on any database but cannot use an index,
+so every search scans the whole table.
+
+SQLiteFTSSearch matches the words against an SQLite FTS5 full text index of
+the fields instead. The index is an external content FTS5 table over the
+model's table, kept in sync by triggers on INSERT, UPDATE and DELETE, so it
+stores just the index and not another copy of the text. It is created (and
+rebuilt) with the crud_search_index management command. Until it's created,
+or if the database is not SQLite, the backend falls back to icontains.
+
+ListFilter implements the list_filter fields, each of which filters the list
+on the value given in the GET argument of the same name.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, \
+        ValidationError
+from django.db import connections
+from django.db.models import Q, BooleanField, NullBooleanField
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.encoding import force_text
+from django.utils.text import smart_split, unescape_string_literal
+from django.utils.translation import ugettext_lazy as _
+
+
+def split_search_term(term):
+    """
+    Returns the words of the search term. A quoted phrase is returned as
+    a single word, without the quotes.
+    """
+    words = []
+    for word in smart_split(term):
+        if word[0] == word[-1] and word[0] in '"\'' and len(word) > 1:
+            word = unescape_string_literal(word)
+        word = word.strip()
+        if word:
+            words.append(word)
+    return words
+
+
+def lookup_needs_distinct(model, path):
+    """
+    Returns a boolean indicating if filtering on the field path can return
+    the same row more than once, which is the case if the path goes through
+    a many-to-many or reverse ForeignKey relation.
+    """
+    for name in path.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not field.is_relation:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return True
+        model = field.related_model
+    return False
+
+
+class IContainsSearch(object):
+    """
+    Search backend that matches each word of the search term against the
+    fields with a case-insensitive containment lookup. Fields can be
+    relation paths ('author__name').
+    """
+    lookup = 'icontains'
+
+    def search(self, queryset, fields, term):
+        words = split_search_term(term)
+        if not fields or not words:
+            return queryset
+        for word in words:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{'%s__%s' % (field, self.lookup): word})
+            queryset = queryset.filter(condition)
+        if any(lookup_needs_distinct(queryset.model, field) for field in fields):
+            queryset = queryset.distinct()
+        return queryset
+
+
+class SQLiteFTSSearch(IContainsSearch):
+    """
+    Search backend that matches the words of the search term, as prefixes,
+    against an SQLite FTS5 index of the fields named <db_table>_fts.
+
+    The index can be used only for the model's own text columns, with an
+    integer primary key as the rowid. Searches that involve other fields, or
+    fields that are not in the index, fall back to icontains.
+
+    The columns of the indexes found are remembered for the lifetime of the
+    process, so an index dropped while the process is running will cause
+    its searches to fail.
+    """
+    suffix = '_fts'
+    _index_columns = {}
+
+    def get_index_name(self, model):
+        return '%s%s' % (model._meta.db_table, self.suffix)
+
+    def get_index_columns(self, model, using):
+        """
+        Returns the columns of model's full text index as a tuple or None if
+        there's no index.
+        """
+        key = (using, model._meta.db_table)
+        columns = self._index_columns.get(key)
+        if columns is None:
+            connection = connections[using]
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master "
+                        "WHERE type = 'table' AND name = %s",
+                        [self.get_index_name(model)])
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute("PRAGMA table_info(%s)" % connection.ops.quote_name(
+                    self.get_index_name(model)))
+                columns = tuple(row[1] for row in cursor.fetchall())
+            self._index_columns[key] = columns
+        return columns
+
+    def get_columns(self, model, fields):
+        """
+        Returns the database columns of the fields or None if any of them is
+        not a text column of the model's table that can be indexed.
+        """
+        pk = model._meta.pk
+        if pk.get_internal_type() not in ('AutoField', 'BigAutoField',
+                'IntegerField', 'BigIntegerField'):
+            return None
+        columns = []
+        for name in fields:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.is_relation or \
+                    field.get_internal_type() not in ('CharField', 'TextField',
+                    'EmailField', 'SlugField', 'URLField'):
+                return None
+            columns.append(field.column)
+        return columns
+
+    def get_match_expression(self, columns, words):
+        """
+        Returns the FTS5 MATCH expression that matches rows where all the
+        words are found, as prefixes, in the columns.
+        """
+        phrases = ' '.join('"%s"*' % word.replace('"', '""') for word in words)
+        return '{%s} : (%s)' % (' '.join('"%s"' % column for column in columns),
+                phrases)
+
+    def search(self, queryset, fields, term):
+        words = split_search_term(term)
+        if not fields or not words:
+            return queryset
+        model = queryset.model
+        using = queryset.db
+        columns = None
+        if connections[using].vendor == 'sqlite':
+            columns = self.get_columns(model, fields)
+        index_columns = self.get_index_columns(model, using) if columns else None
+        if not index_columns or not set(columns) <= set(index_columns):
+            return super(SQLiteFTSSearch, self).search(queryset, fields, term)
+        qn = connections[using].ops.quote_name
+        index = qn(self.get_index_name(model))
+        return queryset.extra(where=['%s.%s IN (SELECT rowid FROM %s WHERE %s MATCH %%s)' % (
+            qn(model._meta.db_table), qn(model._meta.pk.column), index, index)],
+            params=[self.get_match_expression(columns, words)])
+
+    def build(self, model, fields, using):
+        """
+        Creates, or recreates, the full text index of model's fields along
+        with the triggers that keep it in sync with the table and indexes
+        the existing rows.
+        """
+        columns = self.get_columns(model, fields)
+        if not columns:
+            raise ImproperlyConfigured("%s: full text index requires an "
+                    "integer primary key and local text fields, got %s" % (
+                    model._meta.object_name, ', '.join(fields)))
+        self.drop(model, using)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        table = model._meta.db_table
+        index = self.get_index_name(model)
+        rowid = model._meta.pk.column
+        names = ', '.join(qn(column) for column in columns)
+        new = ', '.join('new.%s' % qn(column) for column in columns)
+        old = ', '.join('old.%s' % qn(column) for column in columns)
+        delete = "INSERT INTO %s(%s, rowid, %s) VALUES ('delete', old.%s, %s);" % (
+                qn(index), qn(index), names, qn(rowid), old)
+        insert = "INSERT INTO %s(rowid, %s) VALUES (new.%s, %s);" % (
+                qn(index), names, qn(rowid), new)
+        statements = [
+            "CREATE VIRTUAL TABLE %s USING fts5(%s, content='%s', content_rowid='%s')" % (
+                qn(index), names, table.replace("'", "''"), rowid.replace("'", "''")),
+            "CREATE TRIGGER %s AFTER INSERT ON %s BEGIN %s END" % (
+                qn(index + '_ai'), qn(table), insert),
+            "CREATE TRIGGER %s AFTER DELETE ON %s BEGIN %s END" % (
+                qn(index + '_ad'), qn(table), delete),
+            "CREATE TRIGGER %s AFTER UPDATE OF %s ON %s BEGIN %s %s END" % (
+                qn(index + '_au'), ', '.join([qn(rowid)] + [qn(column)
+                    for column in columns]), qn(table), delete, insert),
+            "INSERT INTO %s(%s) VALUES ('rebuild')" % (qn(index), qn(index)),
+            ]
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        self._index_columns.pop((using, table), None)
+
+    def drop(self, model, using):
+        """
+        Drops the full text index of model and its triggers, if they exist.
+        """
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        index = self.get_index_name(model)
+        with connection.cursor() as cursor:
+            for suffix in ('_ai', '_ad', '_au'):
+                cursor.execute("DROP TRIGGER IF EXISTS %s" % qn(index + suffix))
+            cursor.execute("DROP TABLE IF EXISTS %s" % qn(index))
+        self._index_columns.pop((using, model._meta.db_table), None)
+
+
+SEARCH_BACKENDS = {
+        'icontains': IContainsSearch,
+        'sqlite_fts': SQLiteFTSSearch,
+        }
+
+
+class ListFilter(object):
+    """
+    A list_filter field, which filters the list on the value given in the
+    GET argument of the same name.
+
+    Fields with choices, boolean fields and ForeignKey fields, whose related
+    table has no more than max_choices rows, are filtered through a choice
+    list. Other fields are filtered on the exact value entered.
+    """
+    def __init__(self, model, name, value=None, max_choices=100):
+        try:
+            self.field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            self.field = None
+        if self.field is None or not self.field.concrete or \
+                self.field.many_to_many:
+            raise ImproperlyConfigured("list_filter '%s' is not a field of %s" % (
+                name, model._meta.object_name))
+        self.name = name
+        self.value = value or u''
+        self.max_choices = max_choices
+        self._choices = False
+
+    @property
+    def label(self):
+        if self.field.is_relation:
+            return self.field.related_model._meta.verbose_name.title()
+        return force_text(self.field.verbose_name).title()
+
+    @property
+    def choices(self):
+        """
+        List of (value, label) choices, with the values as text, or None if
+        the filter's value is entered as is.
+        """
+        if self._choices is False:
+            self._choices = self.get_choices()
+        return self._choices
+
+    def get_choices(self):
+        field = self.field
+        if field.choices:
+            return [(force_text(value), force_text(label))
+                    for value, label in field.flatchoices]
+        if isinstance(field, (BooleanField, NullBooleanField)):
+            return [(u'1', force_text(_('Yes'))), (u'0', force_text(_('No')))]
+        if field.is_relation:
+            queryset = field.related_model._default_manager.all()
+            limit_choices_to = field.get_limit_choices_to()
+            if limit_choices_to:
+                queryset = queryset.complex_filter(limit_choices_to)
+            objects = list(queryset[:self.max_choices+1])
+            if len(objects) > self.max_choices:
+                return None
+            target = field.foreign_related_fields[0].attname
+            return [(force_text(getattr(obj, target)), force_text(obj))
+                    for obj in objects]
+        return None
+
+    def clean(self):
+        """
+        Returns the filter's value converted to the field's type or None if
+        there's no value or it's not valid.
+        """
+        if not self.value:
+            return None
+        field = self.field
+        if field.is_relation:
+            field = field.foreign_related_fields[0]
+        try:
+            return field.to_python(self.value)
+        except ValidationError:
+            return None
+
+    def filter(self, queryset):
+        value = self.clean()
+        if value is None:
+            return queryset
+        return queryset.filter(**{self.name: value})
@@ -0,0 +1,69 @@
+/* autocomplete.js */
+/*
+   Support script for AutocompleteSelect widget. Adds a search box in front
+   of every select with a data-lookup-url attribute and, as the user types,
+   replaces the select's options with the matching choices returned by
+   the lookup url. The lookup url returns the choices a page at a time as:
+
+        {"results": [{"id": <value>, "text": <label>}, ...], "more": <bool>}
+
+   If there are more choices, a 'More...' option is appended, selecting
+   which loads the next page.
+ */
+var AUTOCOMPLETE_MORE = '__more__';
+
+function initAutocompleteSelect(sel) {
+    if (sel.data('autocomplete'))
+        return;
+    var state = { term: '', page: 1, timer: null, selected: sel.val() };
+    sel.data('autocomplete', state);
+    var search = $('<input type="search" class="form-control input-sm autocomplete-search"/>');
+    search.attr('placeholder', sel.data('searchPlaceholder') || 'Search...');
+    sel.before(search);
+    search.on('input', function() {
+        if (state.timer)
+            clearTimeout(state.timer);
+        state.timer = setTimeout(function() {
+            state.term = $.trim(search.val());
+            state.page = 1;
+            loadAutocompleteChoices(sel, state, false);
+        }, 250);
+    });
+    sel.change(function() {
+        if (sel.val() == AUTOCOMPLETE_MORE) {
+            sel.val(state.selected);
+            state.page++;
+            loadAutocompleteChoices(sel, state, true);
+        } else {
+            state.selected = sel.val();
+        }
+    });
+}
+
+function loadAutocompleteChoices(sel, state, append) {
+    var url = sel.data('lookupUrl');
+    var prefix = url.indexOf('?') >= 0 ? '&' : '?';
+    url += prefix + 'q=' + encodeURIComponent(state.term) + '&page=' + state.page;
+    $.getJSON(url, function(data) {
+        sel.find('option[value="' + AUTOCOMPLETE_MORE + '"]').remove();
+        if (!append) {
+            // retain the empty choice and the current selection
+            sel.find('option').filter(function() {
+                return this.value && this.value != state.selected;
+            }).remove();
+        }
+        $.each(data.results, function(index, choice) {
+            if (String(choice.id) == state.selected)
+                return;
+            sel.append($('<option/>').val(choice.id).text(choice.text));
+        });
+        if (data.more)
+            sel.append($('<option/>').val(AUTOCOMPLETE_MORE).text('More...'));
+    });
+}
+
+$(document).ready(function() {
+    $('select[data-lookup-url]').each(function(index, element) {
+        initAutocompleteSelect($(element));
+    });
+});
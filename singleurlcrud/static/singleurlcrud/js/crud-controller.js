@@ -117,6 +117,40 @@ function addErrorMode() {
 $(document).ready(function() {
     doPostLoad();
 });
+/*
+   Infinite scroll (CRUDView.infinite_scroll). When the bottom of the list
+   comes into view, the rows that follow are fetched with the rows operation
+   and appended to the table. The cursor of the rows that follow those comes
+   back in the X-Next-Cursor header.
+ */
+var loadingRows = false;
+function loadMoreRows() {
+    var more = $("#id_rows_more");
+    if (loadingRows || !more.length)
+        return;
+    loadingRows = true;
+    var url = compose_url("o=rows",
+            more.attr("data-kwarg")+"="+encodeURIComponent(more.attr("data-cursor")),
+            "rowindex="+totalItems);
+    $.get(url, function(html, status, xhr) {
+        var rows = $($.parseHTML(html, document, true)).filter("tr");
+        $("tr[data-pk]").last().closest("tbody").append(rows);
+        totalItems += rows.length;
+        var cursor = xhr.getResponseHeader("X-Next-Cursor");
+        if (cursor)
+            more.attr("data-cursor", cursor);
+        else
+            more.remove();
+    }).always(function() {
+        loadingRows = false;
+    });
+}
+$(window).scroll(function() {
+    var more = $("#id_rows_more");
+    if (more.length && $(window).scrollTop() + $(window).height() >
+            more.offset().top - 200)
+        loadMoreRows();
+});
 function doPostLoad() {
     /* in Edit mode or in Add-error mode, we need to display
        the item edit panel and not the list of items.
@@ -137,7 +171,8 @@ function doPostLoad() {
             selectNone();
     });
     hideActionMenu();
-    $(".item-selection-checkbox").click(function(evt) {
+    // delegated, so that it applies to rows patched in by partial updates
+    $(document).on("click", ".item-selection-checkbox", function(evt) {
         var cSelectedItemsPrev = cSelectedItems;
         if ($(evt.target).prop("checked"))
             cSelectedItems++;
@@ -156,18 +191,29 @@ function doPostLoad() {
             $("#id_select_all").prop("checked", false);
         }
     });
+    bindFormWidgets($(document));
+}
+/* binds the related-object lookup select boxes found under container */
+function bindFormWidgets(container) {
     // bind on change handler with related-object lookup select boxes
-    $("[data-crfww]").change(function() {
+    container.find("[data-crfww]").change(function() {
         updateChangeRelatedLink($(this));
     });
-    $(".change-existing").click(function() {
+    container.find(".change-existing").click(function(event) {
         event.preventDefault();
         if ($(this).attr('href'))
             return showRelatedObjectPopup(this);
     });
-    $("[data-crfww]").each(function(index, element) {
+    container.find("[data-crfww]").each(function(index, element) {
         updateChangeRelatedLink($(element));
     });
+    // AutocompleteSelect widgets of forms loaded after the page, such as
+    // those of the partial forms (autocomplete.js is in the form's media)
+    if (typeof initAutocompleteSelect == "function") {
+        container.find("select[data-lookup-url]").each(function(index, element) {
+            initAutocompleteSelect($(element));
+        });
+    }
 }
 function updateChangeRelatedLink(sel) {
     var selected = sel.val();
@@ -221,7 +267,9 @@ function deleteItem(id, name) {
    simply hide the edit panel and display the list of items
  */
 function cancelEdit() {
-    if (_popup) {
+    if (partialFormShown()) {
+        $("#id_crud_modal").modal("hide");
+    } else if (_popup) {
         // just dismiss the window
         window.close();
     } else {
@@ -230,7 +278,99 @@ function cancelEdit() {
 }
 /* hide the delete confirmation panel and display the item list */
 function cancelDelete() {
-    window.location = get_opless_url();
+    if (partialFormShown()) {
+        $("#id_crud_modal").modal("hide");
+    } else {
+        window.location = get_opless_url();
+    }
+}
+/*
+   Partial updates (CRUDView.partial_updates). The add/edit/delete page is
+   loaded as a fragment into the list page's modal dialog and its form is
+   posted with AJAX. The view answers with the form, if it has errors, or
+   with JSON holding the item's row, which replaces the row in the table.
+ */
+function partialFormShown() {
+    return $("#id_crud_modal").hasClass("in");
+}
+/* returns the index of the row of the item in the list */
+function rowIndexOf(id) {
+    var checkbox = findRow(id).find(".item-selection-checkbox");
+    if (checkbox.length)
+        return checkbox.attr("id").replace("id_select_", "");
+    return 0;
+}
+function findRow(id) {
+    return $("tr[data-pk]").filter(function() {
+        return String($(this).data("pk")) == String(id);
+    });
+}
+function showPartialForm(url) {
+    $.get(url, function(html) {
+        showPartialContent(url, html);
+    }).fail(showPartialError);
+}
+/* shows the error of a refused partial request in the modal */
+function showPartialError(xhr) {
+    var error = xhr.statusText;
+    try {
+        error = JSON.parse(xhr.responseText).error || error;
+    } catch (e) {
+        // not a JSON response, such as a 404 page
+    }
+    var modal = $("#id_crud_modal");
+    modal.find(".modal-body").empty().append(
+        $('<div class="alert alert-danger" role="alert"/>').text(error));
+    if (!partialFormShown())
+        modal.modal("show");
+}
+function showPartialContent(url, html) {
+    var modal = $("#id_crud_modal");
+    var body = modal.find(".modal-body");
+    body.html(html);
+    modal.find(".modal-title").text(body.find(".crud-partial").data("title") || "");
+    bindFormWidgets(body);
+    body.find("form").submit(function(evt) {
+        evt.preventDefault();
+        $.ajax({
+            url: url,
+            type: "POST",
+            data: new FormData(this),
+            processData: false,
+            contentType: false
+        }).done(function(data) {
+            if (typeof data == "string") {
+                // the form, with the errors
+                showPartialContent(url, data);
+            } else {
+                modal.modal("hide");
+                patchRow(data);
+            }
+        }).fail(showPartialError);
+    });
+    if (!partialFormShown())
+        modal.modal("show");
+}
+/* replaces, adds or removes the row of the item updated */
+function patchRow(data) {
+    var row = findRow(data.pk);
+    if (row.length && data.row) {
+        row.replaceWith(data.row);
+    } else if (row.length) {
+        // unselect the row first, to keep the count of selected rows
+        row.find(".item-selection-checkbox:checked").click();
+        row.remove();
+    } else if (data.row) {
+        var tbody = $("tr[data-pk]").first().closest("tbody");
+        if (!tbody.length) {
+            // list was empty
+            window.location = get_opless_url();
+            return;
+        }
+        tbody.prepend(data.row);
+        totalItems++;
+    }
+    if (typeof onPartialUpdate == "function") { onPartialUpdate(data); }
 }
 /* action to delete multiple items */
 function deleteMultipleItems(ids) {
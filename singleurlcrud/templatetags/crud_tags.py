@@ -1,4 +1,5 @@
 from django.template import Library
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 register = Library()
@@ -58,6 +59,25 @@ def field_label(view, field):
     """
     return view.get_list_field_label(field)
 
+@register.simple_tag
+def sort_label(view, field):
+    """
+    Returns the label of the list_display field as a link that sorts the
+    list on it, with an arrow indicating the current sort direction. Label
+    is returned as is if the list cannot be sorted on the field.
+    """
+    label = view.get_list_field_label(field)
+    url = view.get_sort_url(field)
+    if url is None:
+        return label
+    direction = view.get_sort_direction(field)
+    arrow = ''
+    if direction:
+        arrow = '&nbsp;<span class="glyphicon glyphicon-triangle-%s"></span>' % \
+                ('bottom' if direction == 'desc' else 'top')
+    return format_html(u'<a class="sort-link" href="{0}">{1}</a>{2}', url,
+            label, mark_safe(arrow))
+
 @register.simple_tag
 def eval_field(view, field, obj):
     """
@@ -70,18 +90,21 @@ def eval_field(view, field, obj):
 def render_item(context, item, rowindex, template):
     """
     Tag to render an object.
+
+    Renders a single row and is retained for custom list templates. The
+    list view template renders all rows in one go using render_rows.
     """
-    context['item_template'] = template
-    context['item'] = item
     view = context['view']
-    context['rowindex'] = rowindex
-    context['item_actions'] = view.get_item_actions()
-    context['allow_edit'] = view.allow_edit
-    context['allow_delete'] = view.allow_delete
-    context['item_deletable'] = view.item_deletable(item) and \
-            not getattr(item, 'is_readonly', False)
-    context['item_editable'] = view.item_editable(item) and \
-            not getattr(item, 'is_readonly', False)
-    context['btn_class'] = 'btn-sm' if view.get_item_actions() else 'btn-sm'
+    for state in (view.get_rows_context(), view.get_row_context(item, rowindex)):
+        for key, value in state.items():
+            context[key] = value
+    context['item_template'] = template
     return context
 
+@register.simple_tag(takes_context=True)
+def render_rows(context, rows):
+    """
+    Thunk to view method to render the rows of the list using the view's
+    item template.
+    """
+    return context['view'].render_rows(context, rows)
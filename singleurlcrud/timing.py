@@ -0,0 +1,212 @@
+"""
+Per request performance instrumentation for CRUDView.
+
+When enabled (CRUDView.server_timing = True), CRUDView.dispatch() records
+where the request spends its time:
+
+    db        - number of database queries and the time spent executing them
+    queryset  - building the list queryset (get_queryset())
+    context   - building the template context (get_context_data())
+    rows      - rendering the list rows with the item template, along with
+                the number of rows rendered (and so the time per row)
+    render    - rendering the response's template, which includes the rows
+    total     - the whole request, up to the response being rendered
+
+The timings are sent in the response's Server-Timing header, which browsers
+show in their developer tools, and passed to CRUDView.record_timings(),
+which logs them and sends the request_timed signal.
+
+Queries are counted through connection.execute_wrapper() where available
+(Django >= 2.0) and otherwise by wrapping the cursors that the connection
+makes for the duration of the request, which leaves the connection's query
+log and the django.db.backends logger alone.
+
+The timings of a streamed response (the unpaginated list) are recorded once
+the view returns, before any of its rows are rendered. They have no rows or
+render timing and their queries and total leave out fetching and rendering
+the rows.
+"""
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.db import connections
+from django.dispatch import Signal
+
+# sent by CRUDView.record_timings() with the view, the request, the response
+# and the RequestTimings
+request_timed = Signal(providing_args=['view', 'request', 'response', 'timings'])
+
+
+class QueryTimer(object):
+    """
+    Database execute wrapper that counts the queries and their duration.
+    """
+    def __init__(self, timings):
+        self.timings = timings
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.time()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings.queries += 1
+            self.timings.db_time += time.time() - started
+
+
+class TimedCursor(object):
+    """
+    Cursor wrapper that counts the queries executed through the cursor and
+    their duration, for Django < 2.0 which has no execute wrappers.
+    """
+    def __init__(self, cursor, timings):
+        self.cursor = cursor
+        self.timings = timings
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return self.cursor.__exit__(type, value, traceback)
+
+    def _timed(self, method, *args):
+        started = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.timings.queries += 1
+            self.timings.db_time += time.time() - started
+
+    def execute(self, sql, params=None):
+        return self._timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._timed(self.cursor.executemany, sql, param_list)
+
+
+class RequestTimings(object):
+    """
+    Timings of a request. 'timings' holds the duration of each timed section
+    in seconds, indexed by its name, in the order the sections ended.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.total = 0.0
+        self.timings = OrderedDict()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self._tracked = []
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def wrap(self, name, func):
+        """
+        Returns func wrapped to add its duration to the timing 'name'.
+        """
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.time() - started)
+        return timed
+
+    def start_queries(self):
+        """
+        Starts counting the queries run on all the database connections.
+        Counting left over from a request that did not finish is stopped
+        first.
+        """
+        for connection in connections.all():
+            previous = getattr(connection, '_crud_timings', None)
+            if previous is not None:
+                previous.stop_queries()
+            connection._crud_timings = self
+            if hasattr(connection, 'execute_wrappers'):
+                timer = QueryTimer(self)
+                connection.execute_wrappers.append(timer)
+                self._tracked.append((connection, timer))
+            else:
+                # the connection's own make_cursor/make_debug_cursor, if it
+                # has any, are restored by stop_queries()
+                patched = {}
+                for name in ('make_cursor', 'make_debug_cursor'):
+                    patched[name] = connection.__dict__.get(name)
+                    setattr(connection, name,
+                            self.wrap_make_cursor(getattr(connection, name)))
+                self._tracked.append((connection, patched))
+
+    def wrap_make_cursor(self, make_cursor):
+        """
+        Returns the connection's make_cursor (or make_debug_cursor) wrapped
+        to return TimedCursors.
+        """
+        @wraps(make_cursor)
+        def make_timed_cursor(cursor):
+            return TimedCursor(make_cursor(cursor), self)
+        return make_timed_cursor
+
+    def stop_queries(self):
+        """
+        Stops counting the queries started by start_queries().
+        """
+        for connection, state in self._tracked:
+            if isinstance(state, QueryTimer):
+                if state in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(state)
+            else:
+                for name, make_cursor in state.items():
+                    if make_cursor is None:
+                        connection.__dict__.pop(name, None)
+                    else:
+                        setattr(connection, name, make_cursor)
+            if getattr(connection, '_crud_timings', None) is self:
+                connection._crud_timings = None
+        self._tracked = []
+
+    def finish(self):
+        """
+        Stops counting the queries and records the total duration.
+        """
+        self.stop_queries()
+        self.total = time.time() - self.started
+
+    def as_dict(self):
+        """
+        Returns the timings as a dictionary, with the durations in
+        milliseconds.
+        """
+        data = OrderedDict()
+        data['total'] = self.total * 1000
+        data['queries'] = self.queries
+        data['db'] = self.db_time * 1000
+        for name, seconds in self.timings.items():
+            data[name] = seconds * 1000
+        data['rows_rendered'] = self.rows
+        if self.rows and 'rows' in self.timings:
+            data['per_row'] = self.timings['rows'] * 1000 / self.rows
+        return data
+
+    def server_timing(self):
+        """
+        Returns the value of the Server-Timing header for the timings.
+        """
+        metrics = ['db;dur=%.1f;desc="%d queries"' % (self.db_time * 1000,
+            self.queries)]
+        for name, seconds in self.timings.items():
+            if name == 'rows':
+                metrics.append('rows;dur=%.1f;desc="%d rows"' % (seconds * 1000,
+                    self.rows))
+            else:
+                metrics.append('%s;dur=%.1f' % (name, seconds * 1000))
+        metrics.append('total;dur=%.1f' % (self.total * 1000))
+        return ', '.join(metrics)
@@ -39,32 +39,72 @@ practice at least for the foreseeable future.
                 a popup window. Capability only works for ForeignKey field.
                 ManyToManyField field implementation is pending.
 """
+import calendar
+import csv
+import hashlib
+import json
+import logging
+import time
 from datetime import datetime, date
+from itertools import islice
 
 from django.db import models, transaction, IntegrityError
+from django.db.models import Case, Value, When
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.query import QuerySet
+from django.core.serializers.json import DjangoJSONEncoder
 from django.shortcuts import render, get_object_or_404
 from django.core.urlresolvers import reverse, reverse_lazy
 from django.views.generic import ListView
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, \
+        HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.template import Engine
+from django.template.context import BaseContext, make_context
+from django.template.loader import select_template
 from django.utils.translation import ugettext_lazy as _
 from django.contrib import messages
 from django.forms import ModelForm, forms
 from django.conf import settings
 from django.db.models.fields.related import RelatedField
-from django.utils import six, formats
+from django.utils import six, formats, timezone, translation
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.html import escape, escapejs
-from django.utils.encoding import force_str, force_text, smart_text
+from django.utils.http import http_date, quote_etag
+from django.utils.encoding import force_bytes, force_str, force_text, \
+        smart_text, python_2_unicode_compatible
 try:
     from django.contrib.admin.util import display_for_field, display_for_value
 except ImportError:
     from django.contrib.admin.utils import display_for_field, display_for_value
 from django.core.exceptions import ObjectDoesNotExist, ValidationError, \
         ImproperlyConfigured, PermissionDenied
+from django.utils.functional import lazy
 from django.utils.safestring import mark_safe
 
+from django.core.paginator import InvalidPage, Paginator
+try:
+    from django.db.models import prefetch_related_objects
+except ImportError:
+    # Django < 1.10 takes the lookups as a list
+    from django.db.models.query import prefetch_related_objects as _prefetch_related_objects
+    def prefetch_related_objects(objects, *lookups):
+        _prefetch_related_objects(objects, list(lookups))
+
 from pure_pagination.mixins import PaginationMixin
 
-from singleurlcrud.widgets import CustomRelatedFieldWidgetWrapper
+from singleurlcrud.conditional import ChangeStamps, is_not_modified
+from singleurlcrud.deletion import BulkDelete, get_cascade_counts
+from singleurlcrud.importer import BulkImport, IMPORT_FORMATS
+from singleurlcrud.pagination import KeysetPaginator, \
+        CountStrategyPaginator, CachedCount, COUNT_STRATEGIES
+from singleurlcrud.rowcache import RowCache
+from singleurlcrud.search import ListFilter, SEARCH_BACKENDS
+from singleurlcrud.timing import RequestTimings, request_timed
+from singleurlcrud.widgets import CustomRelatedFieldWidgetWrapper, \
+        AutocompleteSelect
+
+logger = logging.getLogger(__name__)
 
 class ValueFormatter(object):
     '''Class to format list view colum values based on their types.'''
@@ -99,6 +139,385 @@ STANDARD_FORMATTERS = {
         }
 
 
+def _capitalize(text):
+    return force_text(text).capitalize()
+
+# capitalizes a (lazy) translatable text when it's rendered, so that labels
+# cached in the column plan follow the language of each request
+capitalize_lazy = lazy(_capitalize, six.text_type)
+
+
+def split_column_path(name):
+    """
+    Splits a list_display column name into its path components. Both the
+    ORM style 'author__name' and the dotted accessor 'author.name' are
+    accepted and result in ['author', 'name'].
+    """
+    return name.replace('.', LOOKUP_SEP).split(LOOKUP_SEP)
+
+
+def get_model_field(model, name):
+    """
+    Returns the field of model named 'name' or None if there's no such field.
+
+    Besides the regular forward fields, 'name' can also be the accessor name
+    of a reverse relation (for eg., 'question_set' on Author).
+    """
+    try:
+        return model._meta.get_field(name)
+    except models.FieldDoesNotExist:
+        pass
+    for field in model._meta.get_fields():
+        if field.auto_created and not field.concrete and \
+                field.get_accessor_name() == name:
+            return field
+    return None
+
+
+def field_label(field):
+    """
+    Returns the capitalized label of a model field. Reverse relations, which
+    have no verbose_name, are labelled with the related model's
+    verbose_name_plural.
+    """
+    if hasattr(field, 'verbose_name'):
+        return capitalize_lazy(field.verbose_name)
+    return capitalize_lazy(field.related_model._meta.verbose_name_plural)
+
+
+def lookup_column_value(obj, path):
+    """
+    Follows the attribute path from obj and returns the value at its end.
+
+    Multi-valued relations (ManyToManyField and reverse ForeignKey) along the
+    path are expanded and the values from each related object are returned
+    as a comma separated string. Expansion goes through the related
+    manager's all() so that prefetched rows are used, if available.
+    """
+    for index, part in enumerate(path):
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+        if isinstance(obj, models.Manager):
+            rest = path[index+1:]
+            return u', '.join([force_text(lookup_column_value(related, rest))
+                for related in obj.all()])
+    return obj
+
+
+def get_value_path(model, path):
+    """
+    Returns the ORM lookup for the column path if it leads, through forward
+    ForeignKey/OneToOneField relations, to a concrete field that's not a
+    relation and has no choices. Value of such a column can be fetched with
+    QuerySet.values(). Returns None otherwise.
+    """
+    for index, part in enumerate(path):
+        field = get_model_field(model, part)
+        if field is None or not field.concrete:
+            return None
+        last = index == len(path)-1
+        if field.is_relation:
+            if last:
+                return None
+            model = field.related_model
+        elif not last or getattr(field, 'choices', None):
+            return None
+    return LOOKUP_SEP.join(path)
+
+
+def get_sort_path(model, path):
+    """
+    Returns the ORM lookup for the column path if the column can be sorted
+    on, which is the case if it leads, through forward ForeignKey/
+    OneToOneField relations, to a concrete field. Returns None otherwise.
+    """
+    for index, part in enumerate(path):
+        field = get_model_field(model, part)
+        if field is None or not field.concrete:
+            return None
+        if field.is_relation and index < len(path)-1:
+            model = field.related_model
+        elif index < len(path)-1:
+            return None
+    return LOOKUP_SEP.join(path)
+
+
+def has_index_for(model, path):
+    """
+    Returns a boolean indicating if there's an index that the database can
+    use to order model's rows by the lookup path. For a path that spans
+    relations, the last field of the path is checked. An index is one of
+    the field's db_index, unique or primary_key or an index_together or
+    Meta.indexes (Django 1.11+) entry that starts with the field.
+    """
+    parts = path.split(LOOKUP_SEP)
+    for part in parts[:-1]:
+        model = get_model_field(model, part).related_model
+    opts = model._meta
+    field = opts.pk if parts[-1] == 'pk' else get_model_field(model, parts[-1])
+    if field.db_index or field.unique or field.primary_key:
+        return True
+    names = (field.name, field.attname)
+    for fields in opts.index_together:
+        if fields and fields[0] in names:
+            return True
+    for index in getattr(opts, 'indexes', []):
+        if index.fields and index.fields[0].lstrip('-') in names:
+            return True
+    return False
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterates over the queryset using QuerySet.iterator() and yields the
+    objects as lists of up to chunk_size objects. Only one chunk of model
+    instances is held in memory at any time.
+
+    Since iterator() does not honor prefetch_related(), the queryset's
+    prefetch lookups are performed for each chunk.
+    """
+    lookups = queryset._prefetch_related_lookups
+    try:
+        iterator = queryset.iterator(chunk_size=chunk_size)
+    except TypeError:
+        # Django < 2.0 has a fixed chunk size
+        iterator = queryset.iterator()
+    chunk = []
+    for obj in iterator:
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            if lookups:
+                prefetch_related_objects(chunk, *lookups)
+            yield chunk
+            chunk = []
+    if chunk:
+        if lookups:
+            prefetch_related_objects(chunk, *lookups)
+        yield chunk
+
+
+def bulk_update(model, objs, fields, batch_size=None):
+    """
+    Updates the fields of objs, saved instances of model, with one UPDATE
+    query per batch_size objects. Uses QuerySet.bulk_update() where available
+    (Django >= 2.2) and otherwise sets each field to a CASE expression that
+    selects the object's value by its primary key.
+
+    As with bulk_update(), save() is not called, no signals are sent and
+    auto_now fields are not updated.
+    """
+    manager = model._default_manager
+    if hasattr(manager, 'bulk_update'):
+        manager.bulk_update(objs, fields, batch_size=batch_size)
+        return
+    batch_size = batch_size or len(objs)
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start+batch_size]
+        updates = {}
+        for name in fields:
+            field = model._meta.get_field(name)
+            updates[field.name] = Case(*[When(pk=obj.pk,
+                then=Value(getattr(obj, field.attname), output_field=field))
+                for obj in batch], output_field=field)
+        manager.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
+
+
+def get_field_values(obj):
+    """
+    Returns the values of obj's loaded concrete fields as a dictionary,
+    indexed by the field's attname. Deferred fields are left out.
+    """
+    return dict([(field.attname, obj.__dict__[field.attname])
+        for field in obj._meta.concrete_fields
+        if field.attname in obj.__dict__])
+
+
+def get_changed_fields(obj, values):
+    """
+    Returns the names of obj's concrete fields whose values differ from
+    values, as returned by get_field_values(). If any did change, auto_now
+    fields, which are set on every save, are included as well.
+    """
+    changed = []
+    auto_now = []
+    for field in obj._meta.concrete_fields:
+        if field.primary_key or field.attname not in obj.__dict__:
+            continue
+        if field.attname not in values or \
+                obj.__dict__[field.attname] != values[field.attname]:
+            changed.append(field.name)
+        elif getattr(field, 'auto_now', False):
+            auto_now.append(field.name)
+    return changed + auto_now if changed else []
+
+
+class EchoBuffer(object):
+    """
+    File-like object that returns what's written to it, which allows the
+    csv writer to be used for generating the rows of a streamed response.
+    """
+    def write(self, value):
+        return value
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder that encodes the values it does not support (such as
+    model instances) as their text.
+    """
+    def default(self, o):
+        try:
+            return super(ExportJSONEncoder, self).default(o)
+        except TypeError:
+            return force_text(o)
+
+
+def export_csv_row(writer, values):
+    """Returns values formatted as a CSV line by the csv writer."""
+    values = [u'' if value is None else force_text(value) for value in values]
+    if six.PY2:
+        # Python 2 csv module does not support unicode
+        values = [value.encode('utf-8') for value in values]
+    return writer.writerow(values)
+
+
+# Marker in list.html where the rows are inserted when the list is streamed.
+STREAM_ROWS_MARKER = '<!--singleurlcrud:rows-->'
+
+# base template of the add/edit/delete pages requested as fragments
+PARTIAL_BASE_TEMPLATE = 'singleurlcrud/partial.html'
+
+
+# Names of the queryset annotations that carry the rows' editable and
+# deletable flags, if the view provides them as expressions.
+EDITABLE_ANNOTATION = 'crud_item_editable'
+DELETABLE_ANNOTATION = 'crud_item_deletable'
+
+
+# Lookups that autocomplete_fields entries may specify explicitly. Fields
+# listed without one are matched with LOOKUP_DEFAULT_TYPE. On PostgreSQL
+# istartswith compares UPPER(field::text), which needs an expression index,
+# UPPER(field::text) text_pattern_ops, to be served (see README).
+LOOKUP_SEARCH_TYPES = ('exact', 'iexact', 'startswith', 'istartswith',
+        'contains', 'icontains')
+LOOKUP_DEFAULT_TYPE = 'istartswith'
+
+
+# Python type of the values of model fields that have a standard formatter.
+# DateTimeField derives from DateField and therefore has to precede it.
+FIELD_VALUE_TYPES = (
+        (models.DateTimeField, datetime),
+        (models.DateField, date),
+        (models.BooleanField, bool),
+        (models.NullBooleanField, bool),
+        )
+
+
+def column_attr_accessor(name, call=False):
+    """
+    Returns an accessor for the attribute 'name' of the object. If 'call' is
+    True and the attribute is a method, it's invoked to get the value.
+    """
+    def accessor(view, obj):
+        value = getattr(obj, name)
+        if call and callable(value):
+            value = value()
+        return value
+    return accessor
+
+
+def column_method_accessor(name):
+    """Returns an accessor that invokes the method 'name' of the object."""
+    def accessor(view, obj):
+        return getattr(obj, name)()
+    return accessor
+
+
+def column_path_accessor(path):
+    """Returns an accessor that follows a relation path from the object."""
+    def accessor(view, obj):
+        return lookup_column_value(obj, path)
+    return accessor
+
+
+def column_view_accessor(name):
+    """Returns an accessor that invokes the view method 'name' on the object."""
+    def accessor(view, obj):
+        return getattr(view, name)(obj)
+    return accessor
+
+
+class ListColumn(object):
+    """
+    A list_display column compiled to an accessor, its label and its value
+    formatter, so that evaluating a cell does not involve any model metadata
+    lookups.
+
+    Value of a 'safe' column is returned by a model or view method and can
+    contain HTML markup. If formatter is None, the formatter is picked based
+    on the value's type. value_path is the ORM lookup of the column's value
+    if it can be fetched with QuerySet.values() (see get_value_path()) and
+    sort_path the lookup that the column is sorted on, if it's sortable.
+    """
+    def __init__(self, name, label, accessor, formatter=None, safe=False,
+            value_path=None, sort_path=None):
+        self.name = name
+        self.label = label
+        self.accessor = accessor
+        self.formatter = formatter
+        self.safe = safe
+        self.value_path = value_path
+        self.sort_path = sort_path
+
+    def value(self, view, obj):
+        return self.format(view, self.accessor(view, obj))
+
+    def format(self, view, value):
+        """Returns the column's value formatted for display."""
+        if self.safe and type(value) != type(True):
+            value = mark_safe(value)
+        if self.formatter is not None:
+            return self.formatter.format(value) if value is not None else value
+        return view.format_value(value)
+
+
+class ColumnPlan(object):
+    """
+    The compiled form of a view's list_display -- its columns and the
+    relation joins the list queryset needs to render them. value_fields is
+    the tuple of the columns' value paths if all the columns can be fetched
+    with QuerySet.values(), None otherwise.
+    """
+    def __init__(self, list_display, columns, select_related, prefetch_related):
+        self.list_display = tuple(list_display)
+        self.columns = columns
+        self.columns_by_name = dict([(column.name, column) for column in columns])
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+        self.value_fields = None
+        if all(column.value_path for column in columns):
+            self.value_fields = tuple([column.value_path for column in columns])
+
+
+@python_2_unicode_compatible
+class ListRow(object):
+    """
+    A list row fetched with QuerySet.values_list() instead of as a model
+    instance. Holds the primary key, the values of the list_display columns
+    in 'values' and any other values fetched (the editable & deletable
+    annotations, for eg.) as attributes. Its text is the value of the first
+    column.
+    """
+    def __init__(self, pk, values, **attrs):
+        self.pk = pk
+        self.values = values
+        self.__dict__.update(attrs)
+
+    def __str__(self):
+        return force_text(self.values[0]) if self.values else force_text(self.pk)
+
+
 class CRUDView(PaginationMixin, ListView):
     """
     Base view class for a single page CRUD interface.
@@ -124,10 +543,138 @@ class CRUDView(PaginationMixin, ListView):
     list_display_labels = {}
     allow_multiple_item_delete = False
 
+    # relation paths to be joined by the list queryset through select_related()
+    # and prefetch_related() respectively; None lets CRUDView work these out
+    # from list_display
+    list_select_related = None
+    list_prefetch_related = None
+
+    # fetch only the fields that the list page reads -- the list queryset is
+    # restricted with only() to the primary key and the list_display fields
+    # and, if all the columns are plain fields, rows are fetched as tuples
+    # with values_list() without building model instances; list_dependencies
+    # declares the fields read by the columns that are model or view methods
+    # and by item_editable, item_deletable, __str__, is_readonly and a custom
+    # item template, indexed by the column (or method) name
+    list_projection = True
+    list_dependencies = {}
+
+    # pagination mode, one of 'offset' (numbered pages) or 'keyset'
+    # (next/previous pages seeking on the ordering key, see pagination.py)
+    pagination = 'offset'
+    cursor_kwarg = 'cursor'
+
+    # replace the list's pager with rows appended as the user scrolls to the
+    # bottom of the table, rows_chunk_size (paginate_by if None) at a time,
+    # fetched with the rows operation (o=rows&after=<cursor>); implies keyset
+    # pagination
+    infinite_scroll = False
+    rows_chunk_size = None
+    rows_cursor_kwarg = 'after'
+
+    # GET argument with the comma separated list_display columns that the list
+    # is sorted on, each prefixed with '-' for descending order
+    sort_kwarg = 'sort'
+
+    # fields (or relation paths) that the list is searched on for the term in
+    # the search_kwarg GET argument, through the search backend -- one of
+    # 'icontains' or 'sqlite_fts' or a search backend object (see search.py)
+    search_fields = ()
+    search_kwarg = 'q'
+    search_backend = 'icontains'
+
+    # fields that the list can be filtered on, each through the GET argument
+    # of the same name; ForeignKey filters list the related rows as choices
+    # if there are no more than list_filter_max_choices of them
+    list_filter = ()
+    list_filter_max_choices = 100
+
+    # how the paginator counts the rows for numbered pages -- one of 'exact',
+    # 'cached' or 'estimated' or a count strategy object (see pagination.py)
+    count_strategy = 'exact'
+    count_cache_timeout = 60
+
+    # stream the rows of the unpaginated list (page=all) to the client in
+    # chunks of stream_chunk_size rows instead of rendering them in memory
+    stream_all = True
+    stream_chunk_size = 500
+
+    # cache the rendered rows of the list view in Django's cache (see
+    # rowcache.py); row_version_field names a field whose value changes
+    # whenever the row does (an auto_now field, for eg.), if the model has one
+    row_cache = False
+    row_cache_alias = 'default'
+    row_cache_timeout = 300
+    row_version_field = None
+
+    # send list and edit pages with ETag & Last-Modified validators and answer
+    # conditional GETs that match them with 304 Not Modified, without
+    # rendering the page (see conditional.py); the per model change stamps
+    # that the validators are built from are kept in the change_stamp_alias
+    # cache
+    conditional_get = False
+    change_stamp_alias = 'default'
+
+    # allow exporting the list as CSV or NDJSON (o=export), also available as
+    # actions on the selected rows; export_fields are the columns exported,
+    # list_display if None
+    allow_export = False
+    export_fields = None
+    export_chunk_size = 2000
+
+    # allow importing rows from an uploaded CSV or NDJSON file (o=import);
+    # rows are validated with the add form and created with bulk_create()
+    # in batches of import_batch_size, see importer.py
+    allow_import = False
+    import_batch_size = 500
+    import_max_errors = 1000
+
+    # delete_multiple deletes the selected rows in batches of this many
+    # primary keys, each batch in its own transaction (see deletion.py)
+    delete_batch_size = 500
+    # the delete confirmation page lists at most this many of the selected
+    # items, along with the number of rows that would be deleted per model
+    delete_preview_size = 20
+
+    # the inline formset of the edit page shows formset_page_size of the
+    # item's child rows at a time (all of them if None), the page being given
+    # in the formset_page_kwarg GET argument; on save, only the rows that were
+    # changed are validated and they're written with bulk queries of up to
+    # formset_batch_size rows (see save_formset())
+    formset_page_size = 50
+    formset_page_kwarg = 'formset_page'
+    formset_batch_size = 500
+
+    # edits save the item with update_fields set to the fields whose values
+    # the form changed, and skip the save if there are none (see save_form());
+    # set to False if the model's save() changes other fields too
+    update_changed_fields = True
+
     # set this to a dictionary where each item is the CRUD url of
     # the related field, indexed by the field's name
     related_field_crud_urls = {}
 
+    # ForeignKey fields whose form widget fetches its choices on demand from
+    # the lookup operation (o=lookup) instead of rendering all the rows of the
+    # related table; a dictionary where each item is a tuple of the related
+    # model's fields that the search term is matched against, indexed by the
+    # field's name
+    autocomplete_fields = {}
+    lookup_page_size = 20
+
+    # add, edit and delete items from the list in a modal dialog, without
+    # leaving the list page; the forms are requested as fragments, with the
+    # partial_kwarg GET argument, and their POST returns the item's row,
+    # which is updated in place (see get_partial_row_response())
+    partial_updates = False
+    partial_kwarg = 'partial'
+
+    # record the request's query count & database time and the time spent
+    # building the queryset & context and rendering the page & rows, and send
+    # them in the Server-Timing header and to record_timings() (see
+    # timing.py); nothing is recorded, at no cost, if disabled
+    server_timing = False
+
     class ItemAction(object):
         title = ''
         key = ''
@@ -144,24 +691,67 @@ class CRUDView(PaginationMixin, ListView):
         media = Media(js=['%s' % url for url in js], css=css)
         op = self.get_op()
         if op == "add" or op == "edit":
-            form = self.get_form(self.get_form_class())
+            # the form built for the request's context, if it has been
+            # built already, or else a new one
+            form = self._request_form or \
+                    self.get_request_form(**self.get_request_form_kwargs())
             if hasattr(form, 'media'):
                 media += form.media
+            if self._request_formset is not None and \
+                    hasattr(self._request_formset, 'media'):
+                media += self._request_formset.media
+        if self.is_partial_request():
+            # the list page that shows the fragment has loaded the view's
+            # media, whose scripts would run again, binding their handlers
+            # twice, if the fragment included them
+            media = Media(js=[url for url in media._js if url not in js],
+                    css=dict([(medium, [path for path in paths
+                        if path not in css.get(medium, ())])
+                        for medium, paths in media._css.items()]))
         return media
 
     def __init__(self, *args, **kwargs):
         super(CRUDView, self).__init__(*args, **kwargs)
-        self.value_formatters = STANDARD_FORMATTERS
+        self.value_formatters = dict(STANDARD_FORMATTERS)
         self.value_formatters.update(self.get_formatters())
+        # add/edit form & formset of the request, see get_request_form()
+        self._request_form = None
+        self._request_formset = None
+        # page of the inline formset's rows, see get_formset_queryset()
+        self._formset_page = None
+        # object identified by the 'item' GET argument, see get_item(), and
+        # its field values as they were loaded
+        self._item = None
+        self._item_values = None
+        # number of columns written by save_form() in the request
+        self.columns_written = 0
+        # RequestTimings of the request if server_timing is enabled
+        self._timings = None
+        # list_filter of the request, see get_list_filters()
+        self._list_filters = None
 
     def get_form_class(self):
         '''
         Returns the form class to be used for CRUD Add/Edit operations.
+
+        Form classes generated from get_form_fields() are cached in the view
+        class, indexed by the fields, so that they're built only once.
         '''
         if self.form_class:
             return self.form_class
-        from django.forms.models import modelform_factory
-        return modelform_factory(self.get_model(), fields=self.get_form_fields())
+        cls = self.__class__
+        form_classes = cls.__dict__.get('_form_classes')
+        if form_classes is None:
+            form_classes = cls._form_classes = {}
+        model = self.get_model()
+        fields = self.get_form_fields()
+        key = (model, tuple(fields) if fields is not None else None)
+        form_class = form_classes.get(key)
+        if form_class is None:
+            from django.forms.models import modelform_factory
+            form_class = modelform_factory(model, fields=fields)
+            form_classes[key] = form_class
+        return form_class
 
     def get_form_fields(self):
         """
@@ -183,6 +773,144 @@ class CRUDView(PaginationMixin, ListView):
     def get_formset(self, formset_class, **kwargs):
         return formset_class(**kwargs)
 
+    def get_request_form_kwargs(self):
+        """
+        Returns the keyword arguments for the unbound add/edit form of the
+        request.
+        """
+        if self.get_op() == 'edit':
+            return {'instance': self.get_item()}
+        return {}
+
+    def get_request_form(self, **kwargs):
+        """
+        Returns the add/edit form of the current request.
+
+        The form is built through _get_form_helper(), with kwargs, only when
+        this is first called in the request. Subsequent calls, from media()
+        and the context builders, return the same form instance.
+        """
+        if self._request_form is None:
+            self._request_form = self._get_form_helper(self.get_form_class(),
+                    **kwargs)
+        return self._request_form
+
+    def get_request_formset(self, **kwargs):
+        """
+        Same as get_request_form(), but for the formset. Returns None if
+        the view has no formset class.
+        """
+        if self._request_formset is None:
+            formset_class = self.get_formset_class()
+            if not formset_class:
+                return None
+            if 'queryset' not in kwargs:
+                queryset = self.get_formset_queryset(formset_class,
+                        kwargs.get('instance'), kwargs.get('data'))
+                if queryset is not None:
+                    kwargs['queryset'] = queryset
+            formset = self.get_formset(formset_class, **kwargs)
+            if formset.is_bound:
+                # rows that were not changed are neither validated nor saved
+                for form in formset.initial_forms:
+                    form.empty_permitted = True
+            self._request_formset = formset
+        return self._request_formset
+
+    def get_formset_queryset(self, formset_class, instance, data=None):
+        """
+        Returns the queryset of the child rows of instance that its inline
+        formset is built for, or None for the formset's default (all the
+        rows).
+
+        The unbound formset gets a page of formset_page_size rows, in primary
+        key order, the page being given in the formset_page_kwarg GET
+        argument. The bound formset gets the rows that were submitted, those
+        of the page that was edited.
+        """
+        fk = getattr(formset_class, 'fk', None)
+        if fk is None or instance is None or instance.pk is None or \
+                not self.formset_page_size:
+            return None
+        model = formset_class.model
+        pk_field = model._meta.pk
+        queryset = model._default_manager.filter(**{fk.name: instance}).order_by('pk')
+        if data is not None:
+            prefix = formset_class.get_default_prefix()
+            try:
+                total = min(int(data.get('%s-INITIAL_FORMS' % prefix, 0)),
+                        formset_class.absolute_max)
+            except ValueError:
+                total = 0
+            pks = []
+            for i in range(total):
+                try:
+                    pk = pk_field.to_python(data.get('%s-%d-%s' % (prefix, i,
+                        pk_field.name)))
+                except ValidationError:
+                    continue
+                if pk is not None:
+                    pks.append(pk)
+            return queryset.filter(pk__in=pks)
+        paginator = Paginator(queryset.values_list('pk', flat=True),
+                self.formset_page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.formset_page_kwarg, 1))
+        except InvalidPage:
+            page = paginator.page(1)
+        self._formset_page = page
+        return queryset.filter(pk__in=list(page.object_list))
+
+    def get_formset_page_url(self, number):
+        """
+        Returns the URL of the edit page that shows the given page of the
+        inline formset's rows.
+        """
+        query = self.request.GET.copy()
+        query[self.formset_page_kwarg] = number
+        return u'?' + query.urlencode()
+
+    def save_formset(self, request, formset):
+        """
+        Saves the validated formset and returns the list of the rows added or
+        changed.
+
+        Rows of a model formset are added with bulk_create(), changed with
+        bulk_update() of just the fields that changed and deleted a batch of
+        primary keys at a time, formset_batch_size rows per query. As the
+        rows added or changed are not saved through the model's save(),
+        their pre_save/post_save signals are not sent. Formsets whose model
+        has many-to-many fields or parent models are saved with
+        formset.save().
+        """
+        model = getattr(formset, 'model', None)
+        if model is None or model._meta.many_to_many or model._meta.parents:
+            objects = formset.save()
+            if model is not None:
+                self.invalidate_row_count(model)
+            return objects
+        manager = model._default_manager
+        batch_size = self.formset_batch_size
+        objects = formset.save(commit=False)
+        if formset.new_objects:
+            manager.bulk_create(formset.new_objects, batch_size=batch_size)
+        changed = set()
+        for obj, changed_data in formset.changed_objects:
+            changed.update(changed_data)
+        fields = [field.name for field in model._meta.concrete_fields
+                if field.name in changed and not field.primary_key]
+        if fields:
+            bulk_update(model, [obj for obj, changed_data in formset.changed_objects],
+                    fields, batch_size=batch_size)
+        pks = [obj.pk for obj in formset.deleted_objects]
+        for start in range(0, len(pks), batch_size):
+            manager.filter(pk__in=pks[start:start+batch_size]).delete()
+        logger.debug("%s: formset saved, %d rows added, %d changed (%s), %d deleted",
+                self.__class__.__name__, len(formset.new_objects),
+                len(formset.changed_objects), ', '.join(fields), len(pks))
+        self.invalidate_row_count(model)
+        return objects
+
     def get_related_field_crud_urls(self):
         """
         Return the related field CRUD urls for inline related field add/edit
@@ -225,6 +953,458 @@ class CRUDView(PaginationMixin, ListView):
         '''
         return True
 
+    def get_queryset(self):
+        """
+        Returns the queryset for the list view with the joins necessary to
+        render list_display columns applied to it.
+        """
+        queryset = super(CRUDView, self).get_queryset()
+        select_related, prefetch_related = self.get_list_joins()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        logger.debug("%s: list joins select_related=%s prefetch_related=%s",
+                self.__class__.__name__, select_related, prefetch_related)
+        return self.filter_queryset(self.annotate_row_flags(queryset))
+
+    def annotate_row_flags(self, queryset):
+        """
+        Returns queryset annotated with the expressions of
+        get_item_editable_annotation() and get_item_deletable_annotation(),
+        if any.
+        """
+        annotations = {}
+        for name, expression in (
+                (EDITABLE_ANNOTATION, self.get_item_editable_annotation()),
+                (DELETABLE_ANNOTATION, self.get_item_deletable_annotation())):
+            if expression is not None:
+                annotations[name] = expression
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """
+        Returns queryset filtered by the list filters and the search term of
+        the request.
+        """
+        for list_filter in self.get_list_filters():
+            queryset = list_filter.filter(queryset)
+        term = self.get_search_term()
+        if term and self.get_search_fields():
+            queryset = self.get_search_backend().search(queryset,
+                    self.get_search_fields(), term)
+        return queryset
+
+    def get_search_fields(self):
+        return self.search_fields
+
+    def get_search_term(self):
+        return self.request.GET.get(self.search_kwarg, u'').strip()
+
+    def get_search_backend(self):
+        """
+        Returns the search backend object that searches the list.
+        """
+        backend = self.search_backend
+        if isinstance(backend, six.string_types):
+            if backend not in SEARCH_BACKENDS:
+                raise ImproperlyConfigured("Unknown search_backend '%s'" % backend)
+            return SEARCH_BACKENDS[backend]()
+        return backend
+
+    def get_list_filter(self):
+        return self.list_filter
+
+    def get_list_filters(self):
+        """
+        Returns the ListFilter objects of list_filter, with their values
+        taken from the request's GET arguments.
+        """
+        if self._list_filters is None:
+            self._list_filters = [ListFilter(self.get_model(), name,
+                self.request.GET.get(name), self.list_filter_max_choices)
+                for name in self.get_list_filter()]
+        return self._list_filters
+
+    def get_item_queryset(self):
+        """
+        Returns the queryset from which the object that an edit, delete or
+        item action operates on is fetched.
+
+        Defaults to the view's queryset, or else the model's default
+        manager, with the flag annotations of the list so that the object's
+        flags are the same as in the list. The list's search, filters,
+        ordering and joins are not applied.
+        """
+        if self.queryset is not None:
+            queryset = self.queryset.all()
+        else:
+            queryset = self.get_model()._default_manager.all()
+        return self.annotate_row_flags(queryset)
+
+    def get_item(self):
+        """
+        Returns the object identified by the 'item' GET argument.
+
+        The object is fetched from get_item_queryset() when this is first
+        called in the request and the same instance is returned thereafter.
+        Raises Http404 if there's no such object.
+        """
+        if self._item is None:
+            pk = self.request.GET.get('item')
+            if not pk:
+                raise Http404
+            try:
+                self._item = self.get_item_queryset().get(pk=pk)
+            except (ObjectDoesNotExist, ValueError, ValidationError):
+                raise Http404
+            self._item_values = get_field_values(self._item)
+        return self._item
+
+    def get_sort(self):
+        """
+        Returns the list of 2-tuples (column, descending) of the sortable
+        list_display columns requested in the sort GET argument. Columns
+        that are not sortable are ignored.
+
+        With keyset pagination, only the columns of local non-nullable
+        fields can be sorted on.
+        """
+        sort = []
+        sorted_names = set()
+        columns = self.get_column_plan().columns_by_name
+        keyset = self.get_pagination() == 'keyset'
+        for name in self.request.GET.get(self.sort_kwarg, '').split(','):
+            name = name.strip()
+            descending = name.startswith('-')
+            column = columns.get(name.lstrip('-'))
+            if column is None or not column.sort_path or \
+                    column.name in sorted_names:
+                continue
+            if keyset:
+                field = get_model_field(self.get_model(), column.sort_path)
+                if field is None or field.null or field.is_relation:
+                    continue
+            sort.append((column, descending))
+            sorted_names.add(column.name)
+        return sort
+
+    def get_ordering(self):
+        """
+        Returns the ordering requested through the sort GET argument, with
+        the primary key appended as the tie-breaker so that the order of
+        the rows, and thus the pages, is stable. Returns the ordering option
+        if no sorting was requested.
+        """
+        sort = self.get_sort()
+        if not sort:
+            return super(CRUDView, self).get_ordering()
+        ordering = [('-' if descending else '') + column.sort_path
+                for column, descending in sort]
+        if sort[-1][0].sort_path != 'pk':
+            ordering.append('-pk' if sort[-1][1] else 'pk')
+        if settings.DEBUG:
+            # each ordering is checked, and warned about, once per view class
+            cls = self.__class__
+            checked = cls.__dict__.get('_checked_orderings')
+            if checked is None:
+                checked = cls._checked_orderings = set()
+            path = ordering[0].lstrip('-')
+            if path not in checked:
+                checked.add(path)
+                if not has_index_for(self.get_model(), path):
+                    logger.warning(
+                            "%s: no index supports ordering by '%s' of %s",
+                            cls.__name__, path,
+                            self.get_model()._meta.object_name)
+        return ordering
+
+    def get_sort_url(self, name):
+        """
+        Returns the querystring that sorts the list on the column 'name',
+        ascending unless the list is already sorted ascending on it.
+        Returns None if the column is not sortable.
+        """
+        column = self.get_column_plan().columns_by_name.get(name)
+        if column is None or not column.sort_path:
+            return None
+        sort = self.get_sort()
+        descending = bool(sort) and sort[0][0] is column and not sort[0][1]
+        query = self.request.GET.copy()
+        for arg in ('o', 'item', self.page_kwarg, self.cursor_kwarg):
+            query.pop(arg, None)
+        query[self.sort_kwarg] = ('-' if descending else '') + name
+        return u'?' + query.urlencode()
+
+    def get_sort_direction(self, name):
+        """
+        Returns 'asc' or 'desc' if the list is sorted on the column 'name'
+        or None otherwise.
+        """
+        for column, descending in self.get_sort():
+            if column.name == name:
+                return 'desc' if descending else 'asc'
+        return None
+
+    def get_list_joins(self):
+        """
+        Returns a 2-tuple (select_related, prefetch_related) of the relation
+        paths to be joined by the list queryset.
+
+        If list_select_related or list_prefetch_related are specified, they
+        are used as is. Otherwise the paths are worked out from the
+        list_display columns such that forward ForeignKey & OneToOneField
+        relations are fetched with select_related() and ManyToManyField &
+        reverse relations are fetched with prefetch_related().
+
+        Override to control the joins dynamically.
+        """
+        plan = self.get_column_plan()
+        select_related, prefetch_related = plan.select_related, plan.prefetch_related
+        if self.list_select_related is not None:
+            select_related = tuple(self.list_select_related)
+        if self.list_prefetch_related is not None:
+            prefetch_related = tuple(self.list_prefetch_related)
+        return select_related, prefetch_related
+
+    def get_list_dependencies(self):
+        return self.list_dependencies
+
+    def get_list_only_fields(self):
+        """
+        Returns the tuple of field paths that the list queryset is restricted
+        to with only() or None if the list needs the complete rows.
+
+        Fields are the primary key, the list_display fields (a column that
+        displays a related object loads the whole related row), the
+        declared list_dependencies, row_version_field and the local fields
+        the list is ordered on. The complete rows are needed if anything
+        that reads the rows -- a method column, an overridden item_editable(),
+        item_deletable() or __str__(), an is_readonly property or a custom
+        item template -- has not declared its dependencies.
+        """
+        model = self.get_model()
+        dependencies = self.get_list_dependencies()
+        select_related = self.get_list_joins()[0]
+        paths = [model._meta.pk.name]
+        whole = []
+
+        def add(path):
+            # adds the fields that loading path requires, returns False if
+            # it's not a path of fields that can be loaded with only()
+            parts = split_column_path(path)
+            current = model
+            for index, part in enumerate(parts):
+                field = get_model_field(current, part)
+                if field is None or (field.is_relation and
+                        not field.many_to_many and not field.concrete):
+                    return False
+                if field.many_to_many or field.one_to_many:
+                    # prefetched through the primary key
+                    return True
+                relation = LOOKUP_SEP.join(parts[:index])
+                if relation and not any(join == relation or
+                        join.startswith(relation + LOOKUP_SEP)
+                        for join in select_related):
+                    return False
+                prefix = LOOKUP_SEP.join(parts[:index+1])
+                if prefix not in paths:
+                    paths.append(prefix)
+                if not field.is_relation:
+                    return True
+                current = field.related_model
+            whole.append(LOOKUP_SEP.join(parts))
+            return True
+
+        def add_dependencies(name):
+            if name not in dependencies:
+                return False
+            return all(add(path) for path in dependencies[name])
+
+        for column in self.get_column_plan().columns:
+            if not add(column.name) and not add_dependencies(column.name):
+                return None
+        for name, annotation in (
+                ('item_editable', self.get_item_editable_annotation()),
+                ('item_deletable', self.get_item_deletable_annotation())):
+            if annotation is None and (self._is_overridden(name) or
+                    self._is_overridden(name.replace('item_', 'items_'))):
+                if not add_dependencies(name):
+                    return None
+        if hasattr(model, 'is_readonly') and not add('is_readonly') and \
+                not add_dependencies('is_readonly'):
+            return None
+        if (six.get_unbound_function(model.__str__) is not
+                six.get_unbound_function(models.Model.__str__) or
+                six.PY2 and hasattr(model, '__unicode__')) and \
+                not add_dependencies('__str__'):
+            return None
+        if self.get_item_template() != CRUDView.get_item_template(self) and \
+                not add_dependencies('item_template'):
+            return None
+        if self.row_version_field and not add(self.row_version_field):
+            return None
+        for name in self.get_ordering() or model._meta.ordering:
+            if isinstance(name, six.string_types) and \
+                    LOOKUP_SEP not in name.lstrip('-'):
+                add(name.lstrip('-'))
+        return tuple([path for path in paths if not any(
+            path.startswith(relation + LOOKUP_SEP) for relation in whole)])
+
+    def can_fetch_list_rows(self):
+        """
+        Returns a boolean indicating if the list rows can be fetched as
+        ListRow tuples with values_list(). Besides the requirements of
+        can_fetch_list_values(), this needs the default item template, which
+        reads nothing but the column values and the primary key, and numbered
+        pages, as keyset pages read the ordering key from model instances.
+        """
+        return self.list_projection and self.get_pagination() != 'keyset' and \
+                self.get_item_template() == CRUDView.get_item_template(self) and \
+                self.can_fetch_list_values()
+
+    def project_list_queryset(self, queryset):
+        """
+        Returns the list queryset restricted to the fields of
+        get_list_only_fields(). The projection chosen is logged at DEBUG
+        level.
+        """
+        fields = None
+        if self.list_projection and isinstance(queryset, QuerySet):
+            fields = self.get_list_only_fields()
+        if fields is not None:
+            queryset = queryset.only(*fields)
+        logger.debug("%s: list rows fetched %s", self.__class__.__name__,
+                'as values_list()' if self.can_fetch_list_rows() else
+                'with only(%s)' % ', '.join(fields) if fields is not None else
+                'as complete model instances')
+        return queryset
+
+    def get_list_rows(self, queryset):
+        """
+        Generator that yields the rows of queryset as ListRow objects,
+        fetched with values_list() through QuerySet.iterator().
+        """
+        plan = self.get_column_plan()
+        attrs = [name for name in (EDITABLE_ANNOTATION, DELETABLE_ANNOTATION)
+                if name in queryset.query.annotations]
+        if get_model_field(self.get_model(), 'is_readonly') is not None:
+            attrs.append('is_readonly')
+        if self.row_version_field and self.row_version_field not in attrs:
+            attrs.append(self.row_version_field)
+        count = len(plan.value_fields)
+        queryset = queryset.prefetch_related(None).values_list('pk',
+                *(list(plan.value_fields) + attrs))
+        for values in queryset.iterator():
+            yield ListRow(values[0], values[1:count+1],
+                    **dict(zip(attrs, values[count+1:])))
+
+    def get_column_plan(self):
+        """
+        Returns the ColumnPlan for list_display.
+
+        The plan is compiled once and cached in the view class, so that
+        subsequent requests reuse it. It's rebuilt only if list_display
+        changes.
+        """
+        cls = self.__class__
+        plan = cls.__dict__.get('_column_plan')
+        if plan is None or plan.list_display != tuple(self.list_display):
+            plan = self.compile_column_plan()
+            cls._column_plan = plan
+        return plan
+
+    def compile_column_plan(self, names=None):
+        """
+        Compiles list_display, or the column names given, into a ColumnPlan.
+        """
+        if names is None:
+            names = self.list_display
+        select_related, prefetch_related = self.plan_list_joins(names)
+        return ColumnPlan(names, [self.compile_column(name) for name in names],
+                select_related, prefetch_related)
+
+    def compile_column(self, name):
+        """
+        Resolves a list_display column to a ListColumn. A column is one of
+        (in order of precedence):
+            1. model field (using its get_FOO_display() if it has choices)
+            2. field of a related model ('author__name' or 'author.name')
+            3. model object's attribute
+            4. view subclass's method that takes the object as argument
+        """
+        column = self._compile_column(name)
+        path = split_column_path(name)
+        column.value_path = get_value_path(self.get_model(), path)
+        column.sort_path = get_sort_path(self.get_model(), path)
+        return column
+
+    def _compile_column(self, name):
+        model = self.get_model()
+        label = self.label_for_field(name)
+        path = split_column_path(name)
+        field = get_model_field(model, name) if len(path) == 1 else None
+
+        if field is not None:
+            if field.many_to_many or field.one_to_many:
+                if field.auto_created:
+                    path = [field.get_accessor_name()]
+                return ListColumn(name, label, column_path_accessor(path))
+            if getattr(field, 'choices', None):
+                return ListColumn(name, label,
+                        column_method_accessor('get_%s_display' % name))
+            formatter = None
+            for field_class, value_type in FIELD_VALUE_TYPES:
+                if isinstance(field, field_class):
+                    if value_type in self.value_formatters:
+                        formatter = self.value_formatters[value_type]()
+                    break
+            return ListColumn(name, label, column_attr_accessor(name),
+                    formatter)
+
+        if len(path) > 1:
+            return ListColumn(name, label, column_path_accessor(path))
+        if hasattr(model, name):
+            return ListColumn(name, label, column_attr_accessor(name, True),
+                    safe=True)
+        if hasattr(self, name):
+            return ListColumn(name, label, column_view_accessor(name),
+                    safe=True)
+        raise models.FieldDoesNotExist("Could not evaluate column '"+name+"'")
+
+    def plan_list_joins(self, names=None):
+        """
+        Walks each list_display column (or each of the column names given),
+        including '__' spanning paths and dotted accessors, through the
+        model's relations and returns the 2-tuple (select_related,
+        prefetch_related) of relation paths that avoid a query per row.
+        Columns that are not model fields (model or view methods) do not
+        contribute any joins.
+        """
+        select_related = []
+        prefetch_related = []
+        for name in (self.list_display if names is None else names):
+            model = self.get_model()
+            relations = []
+            single_valued = True
+            for part in split_column_path(name):
+                field = get_model_field(model, part)
+                if field is None or not field.is_relation or \
+                        field.related_model is None:
+                    break
+                relations.append(part)
+                if field.many_to_many or field.one_to_many:
+                    single_valued = False
+                model = field.related_model
+            if relations:
+                joins = select_related if single_valued else prefetch_related
+                path = LOOKUP_SEP.join(relations)
+                if path not in joins:
+                    joins.append(path)
+        return tuple(select_related), tuple(prefetch_related)
+
     def get_list_field_label(self, name):
         """
         Returns the label for a list_display field which can be used
@@ -233,42 +1413,14 @@ class CRUDView(PaginationMixin, ListView):
         'field_label' template tag uses this method to get label for each
         column specified in list_display.
         """
-        assert(name in self.list_display)
-        return self.label_for_field(name)
+        return self.get_column_plan().columns_by_name[name].label
 
     def get_list_field_value(self, name, obj):
         """
         Returns the displayable value for a field specified in
         list_display.
         """
-        value = ""
-        assert(name in self.list_display)
-        try:
-            field = obj._meta.get_field(name)
-            try:
-                if len(field.get_choices()) > 0 and hasattr(obj, 'get_'+name+'_display'):
-                    value = getattr(obj, 'get_'+name+'_display')()
-                else:
-                    value = getattr(obj, name)
-            except AttributeError:
-                value = getattr(obj, name)
-        except models.FieldDoesNotExist:
-            from django.utils.safestring import mark_safe
-            if hasattr(self.get_model(), name):
-                value = getattr(obj, name)
-            elif hasattr(self, name):
-                value = getattr(self, name)(obj)
-            else:
-                raise models.FieldDoesNotExist("Could not evaluate column '"+name+"'")
-            if type(value) != type(True):
-                value = mark_safe(value)
-        '''
-        if type(value) == datetime:
-            value = formats.date_format(value, "SHORT_DATETIME_FORMAT")
-        if type(value) == bool:
-            return BooleanValueFormatter().format(value)
-        '''
-        return self.format_value(value)
+        return self.get_column_plan().columns_by_name[name].value(self, obj)
 
     def label_for_field(self, name):
         """
@@ -282,14 +1434,27 @@ class CRUDView(PaginationMixin, ListView):
         label = ""
         try:
             field = model._meta.get_field_by_name(name)[0]
-            label = field.verbose_name.capitalize()
+            label = field_label(field)
         except models.FieldDoesNotExist:
             '''
             Not a db field. Treat as one of:
-                1. model object's attribute
-                2. view subclass's attribute
+                1. field of a related model ('author__name' or 'author.name')
+                2. model object's attribute
+                3. view subclass's attribute
             '''
-            if hasattr(self.get_model(), name):
+            path = split_column_path(name)
+            if len(path) > 1:
+                field = None
+                for part in path:
+                    field = get_model_field(model, part) if model else None
+                    model = field.related_model if field else None
+                if field is None:
+                    raise AttributeError("Unable to locate '%s' on %s" % (name, self))
+                label = field_label(field)
+            elif get_model_field(model, name) is not None:
+                # reverse relation by its accessor name ('question_set')
+                label = field_label(get_model_field(model, name))
+            elif hasattr(self.get_model(), name):
                 method = getattr(self.get_model(), name)
                 if hasattr(method, "short_description"):
                     label = getattr(method, "short_description")
@@ -334,6 +1499,8 @@ class CRUDView(PaginationMixin, ListView):
             return ['singleurlcrud/delete.html']
         elif op == u'delete_multiple':
             return ['singleurlcrud/delete.html']
+        elif op == u'import':
+            return ['singleurlcrud/import.html']
         return ['singleurlcrud/list.html']
 
     def get_context_data(self, **kwargs):
@@ -343,9 +1510,9 @@ class CRUDView(PaginationMixin, ListView):
         context = {
             'item_template': self.get_item_template(),
             'view': self,
-            'base_template': settings.SIMPLECRUD_BASE_TEMPLATE,
+            'base_template': PARTIAL_BASE_TEMPLATE if self.is_partial_request()
+                    else settings.SIMPLECRUD_BASE_TEMPLATE,
             'breadcrumbs': self.get_breadcrumbs(),
-            'media': self.media(),
             'item_name': self.get_model()._meta.verbose_name.title(),
             'allow_create': self.get_allow_create(),
             'allow_edit': self.get_allow_edit(),
@@ -358,16 +1525,28 @@ class CRUDView(PaginationMixin, ListView):
             'edit': self.get_edit_context_data,
             'delete': self.get_delete_context_data,
             'delete_multiple': self.get_delete_multiple_context_data,
+            'import': self.get_import_context_data,
         }
 
         if self.get_op() in context_handler:
             if '_popup' in self.request.GET:
                 context['popup'] = self.request.GET['_popup']
             context.update(context_handler[self.get_op()](**kwargs))
+            # media is collected from the form built for the context
+            context['media'] = self.media()
             return context
 
         # list-view context data
+        context['media'] = self.media()
+        self.object_list = self.project_list_queryset(self.object_list)
         context.update(super(CRUDView, self).get_context_data(**kwargs))
+        stream_rows = self.is_streaming_list(context['object_list'],
+                context['is_paginated'])
+        if not stream_rows and isinstance(context['object_list'], QuerySet) and \
+                self.can_fetch_list_rows():
+            context['object_list'] = list(self.get_list_rows(context['object_list']))
+            if context.get('page_obj') is not None:
+                context['page_obj'].object_list = context['object_list']
 
         # If action column width was not explicitly specified,
         # determine the optimum width for the action column buttons
@@ -398,14 +1577,687 @@ class CRUDView(PaginationMixin, ListView):
             'actions': self.get_actions_as_str(),
             'item_actions': self.get_item_actions(),
             'add_item_custom_url': self.get_add_item_custom_url(),
+            'allow_import': self.get_allow_create() and self.get_allow_import(),
             'edit_item_custom_url': self.get_edit_item_custom_url(),
             'delete_item_custom_url': self.get_delete_item_custom_url(),
             'action_col_width': str(action_col_width)+'px',
             'disallowed_create_message': self.get_disallowed_create_message(),
+            'keyset_pagination': self.get_pagination() == 'keyset',
+            'search_fields': self.get_search_fields(),
+            'search_term': self.get_search_term(),
+            'list_filters': self.get_list_filters(),
+            'sort': self.request.GET.get(self.sort_kwarg, u''),
+            'stream_rows': stream_rows,
+            'partial_updates': self.partial_updates,
+            'infinite_scroll': self.infinite_scroll,
         }
         context.update(extra_context)
         return context
 
+    def is_streaming_list(self, object_list, is_paginated):
+        """
+        Returns a boolean indicating if the list rows are to be streamed.
+        Only non-empty unpaginated lists (page=all) are streamed.
+        """
+        return self.stream_all and not is_paginated and \
+                self.get_paginate_by(object_list) is None and \
+                isinstance(object_list, models.QuerySet) and \
+                object_list.exists()
+
+    def render_to_response(self, context, **response_kwargs):
+        """
+        Overridden to return a StreamingHttpResponse for streamed lists.
+        """
+        if context.get('stream_rows'):
+            return self.render_streaming_list(context, **response_kwargs)
+        return super(CRUDView, self).render_to_response(context, **response_kwargs)
+
+    def render_streaming_list(self, context, **response_kwargs):
+        """
+        Returns a StreamingHttpResponse that renders the list page. The page
+        is rendered without the rows, which are then rendered and flushed to
+        the client stream_chunk_size rows at a time.
+        """
+        template = select_template(self.get_template_names())
+        page = template.render(context, self.request)
+        head, tail = page.split(STREAM_ROWS_MARKER, 1)
+        queryset = context['object_list']
+
+        def generate():
+            yield head
+            count = 0
+            if self.can_fetch_list_rows():
+                list_rows = self.get_list_rows(queryset)
+                chunks = iter(lambda: list(islice(list_rows,
+                    self.stream_chunk_size)), [])
+            else:
+                chunks = iterate_in_chunks(queryset, self.stream_chunk_size)
+            for rows in chunks:
+                yield self.render_rows(context, rows, count)
+                count += len(rows)
+            yield '<script type="text/javascript" charset="utf-8">' \
+                    'totalItems = %d;</script>' % count
+            yield tail
+
+        content_type = response_kwargs.get('content_type', self.content_type)
+        return StreamingHttpResponse(generate(), content_type=content_type)
+
+    def get_export_plan(self):
+        """
+        Returns the ColumnPlan for the export fields, which is cached in the
+        view class like the list_display plan.
+        """
+        names = tuple(self.get_export_fields())
+        cls = self.__class__
+        plan = cls.__dict__.get('_export_plan')
+        if plan is None or plan.list_display != names:
+            plan = self.compile_column_plan(names)
+            cls._export_plan = plan
+        return plan
+
+    def export(self, request):
+        """
+        Handles the export operation, which streams the rows of the list
+        in the format given by the 'fmt' GET argument, 'csv' or 'ndjson'.
+        Rows are those of get_queryset(), limited to the comma separated
+        primary keys in the 'items' GET argument, if specified.
+        """
+        fmt = request.GET.get('fmt', 'csv')
+        if fmt not in ('csv', 'ndjson'):
+            raise Http404
+        queryset = self.get_queryset()
+        items = request.GET.get('items')
+        if items:
+            queryset = queryset.filter(pk__in=items.split(','))
+        return self.render_export(queryset, fmt)
+
+    def iterate_export_rows(self, queryset, plan):
+        """
+        Generator that yields the export field values of the rows of
+        queryset as lists.
+
+        Rows are read through QuerySet.iterator(), as value tuples if all
+        the export fields are plain fields, else as model instances
+        export_chunk_size at a time.
+        """
+        if plan.value_fields is not None:
+            queryset = queryset.select_related(None).prefetch_related(None)
+            for values in queryset.values_list(*plan.value_fields).iterator():
+                yield values
+            return
+        queryset = queryset.select_related(*plan.select_related) \
+                .prefetch_related(None).prefetch_related(*plan.prefetch_related)
+        for chunk in iterate_in_chunks(queryset, self.export_chunk_size):
+            for obj in chunk:
+                yield [column.accessor(self, obj) for column in plan.columns]
+
+    def render_export(self, queryset, fmt):
+        """
+        Returns a StreamingHttpResponse of the export fields of the rows of
+        queryset as CSV (with a header row of the field labels) or NDJSON
+        (one JSON object per row, indexed by the field names).
+        """
+        plan = self.get_export_plan()
+        rows = self.iterate_export_rows(queryset, plan)
+        chunk_size = self.export_chunk_size
+
+        def generate_csv():
+            writer = csv.writer(EchoBuffer())
+            yield export_csv_row(writer,
+                    [column.label for column in plan.columns])
+            lines = []
+            for values in rows:
+                lines.append(export_csv_row(writer, values))
+                if len(lines) == chunk_size:
+                    yield ''.join(lines)
+                    lines = []
+            yield ''.join(lines)
+
+        def generate_ndjson():
+            names = [column.name for column in plan.columns]
+            lines = []
+            for values in rows:
+                lines.append(json.dumps(dict(zip(names, values)),
+                    cls=ExportJSONEncoder, separators=(',', ':')))
+                lines.append('\n')
+                if len(lines) >= chunk_size:
+                    yield ''.join(lines)
+                    lines = []
+            yield ''.join(lines)
+
+        if fmt == 'csv':
+            response = StreamingHttpResponse(generate_csv(),
+                    content_type='text/csv; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(generate_ndjson(),
+                    content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % \
+                (self.get_model()._meta.model_name, fmt)
+        return response
+
+    def is_json_request(self):
+        """
+        Returns a boolean indicating if the list is requested as JSON, either
+        through the 'format=json' GET argument or the Accept header.
+        """
+        if self.request.GET.get('format') == 'json':
+            return True
+        accept = self.request.META.get('HTTP_ACCEPT', '')
+        return 'application/json' in accept and 'text/html' not in accept
+
+    def is_partial_request(self):
+        """
+        Returns a boolean indicating if the add, edit or delete page is
+        requested as a fragment, through the partial_kwarg GET argument.
+        Deleting multiple items is not done in fragments.
+        """
+        return bool(self.partial_updates and
+                self.get_op() in ('add', 'edit', 'delete') and
+                not self.request.GET.get('items') and
+                self.request.GET.get(self.partial_kwarg))
+
+    def get_partial_error_response(self, message, status=403):
+        """
+        Returns the JSON response to a partial request that was refused,
+        whose 'error' the list page shows in its modal dialog.
+        """
+        return JsonResponse({'error': force_text(message)}, status=status)
+
+    def get_fragment_context(self):
+        """
+        Returns the context for rendering rows outside of the list page, as
+        the fragments of partial updates and of the rows operation.
+        """
+        return {
+            'view': self,
+            'actions': self.get_actions_as_str(),
+            }
+
+    def render_rows_fragment(self):
+        """
+        Returns the response to the rows operation: the rows that follow the
+        cursor given in the rows_cursor_kwarg GET argument (the first rows if
+        there's none), rows_chunk_size of them, rendered with the item
+        template as an HTML fragment. The rows are fetched with a keyset
+        query, so each chunk costs the same however deep it is.
+
+        The cursor of the rows that follow is returned in the X-Next-Cursor
+        header, which is left out after the last rows. The index of the first
+        row in the list is given in the 'rowindex' GET argument.
+        """
+        queryset = self.project_list_queryset(self.get_queryset())
+        size = self.rows_chunk_size or self.get_paginate_by(queryset) or \
+                self.stream_chunk_size
+        paginator = KeysetPaginator(queryset, size, request=self.request,
+                cursor_kwarg=self.rows_cursor_kwarg)
+        try:
+            page = paginator.page(self.request.GET.get(self.rows_cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        try:
+            rowindex = int(self.request.GET.get('rowindex', 0))
+        except ValueError:
+            rowindex = 0
+        response = HttpResponse(self.render_rows(self.get_fragment_context(),
+            page.object_list, rowindex))
+        if page.has_next():
+            response['X-Next-Cursor'] = page.next_cursor()
+        return response
+
+    def get_partial_row_response(self, pk, message=None):
+        """
+        Returns the JSON response to a partial add or edit, which holds the
+        item's row rendered with the item template. The row is fetched as it
+        is for the list and is empty if the item is no longer in the list.
+        The index of the row is given in the 'rowindex' GET argument.
+        """
+        try:
+            rowindex = int(self.request.GET.get('rowindex', 0))
+        except ValueError:
+            rowindex = 0
+        queryset = self.project_list_queryset(self.get_queryset().filter(pk=pk))
+        if self.can_fetch_list_rows():
+            rows = list(self.get_list_rows(queryset))
+        else:
+            rows = list(queryset)
+        row = u''
+        if rows:
+            row = self.render_rows(self.get_fragment_context(), rows, rowindex)
+        return JsonResponse({
+            'pk': pk,
+            'row': row,
+            'message': force_text(message) if message else None,
+            })
+
+    def can_fetch_list_values(self):
+        """
+        Returns a boolean indicating if the list rows can be fetched with
+        QuerySet.values() instead of as model instances. This is the case
+        if all the list_display columns are plain database fields and the
+        rows' editable & deletable flags come from the default methods or
+        from queryset annotations.
+        """
+        if self.get_column_plan().value_fields is None:
+            return False
+        for methods, annotation in (
+                (('item_editable', 'items_editable'),
+                    self.get_item_editable_annotation()),
+                (('item_deletable', 'items_deletable'),
+                    self.get_item_deletable_annotation())):
+            if annotation is not None:
+                continue
+            if any(self._is_overridden(name) for name in methods):
+                return False
+        readonly = get_model_field(self.get_model(), 'is_readonly')
+        if readonly is None and hasattr(self.get_model(), 'is_readonly'):
+            return False
+        return True
+
+    def _is_overridden(self, name):
+        # True if the view class overrides CRUDView's method 'name'
+        return six.get_unbound_function(getattr(self.__class__, name)) is not \
+                six.get_unbound_function(getattr(CRUDView, name))
+
+    def get_json_rows(self, object_list):
+        """
+        Returns the list of rows of the JSON list. Each row is a dictionary
+        with the keys 'pk', 'values' (the list_display column values),
+        'editable' and 'deletable'.
+
+        Rows are fetched with values() if can_fetch_list_values() allows it
+        and object_list is a queryset. Otherwise the column values are the
+        raw field values for the plain field columns and the formatted text
+        for the rest.
+        """
+        plan = self.get_column_plan()
+        model = self.get_model()
+        rows = []
+        if isinstance(object_list, QuerySet) and self.can_fetch_list_values():
+            fields = ['pk'] + list(plan.value_fields)
+            for name in (EDITABLE_ANNOTATION, DELETABLE_ANNOTATION):
+                if name in object_list.query.annotations:
+                    fields.append(name)
+            readonly = get_model_field(model, 'is_readonly') is not None
+            if readonly:
+                fields.append('is_readonly')
+            for values in object_list.values(*fields):
+                readonly = values.get('is_readonly', False)
+                rows.append({
+                    'pk': values['pk'],
+                    'values': [values[path] for path in plan.value_fields],
+                    'editable': not readonly and
+                        bool(values.get(EDITABLE_ANNOTATION, True)),
+                    'deletable': not readonly and
+                        bool(values.get(DELETABLE_ANNOTATION, True)),
+                    })
+            return rows
+
+        objects = list(object_list)
+        for obj, flags in zip(objects, self.get_rows_flags(objects)):
+            values = []
+            for column in plan.columns:
+                if column.value_path:
+                    values.append(lookup_column_value(obj,
+                        split_column_path(column.value_path)))
+                else:
+                    values.append(force_text(column.value(self, obj)))
+            rows.append({
+                'pk': obj.pk,
+                'values': values,
+                'editable': bool(flags[0]),
+                'deletable': bool(flags[1]),
+                })
+        return rows
+
+    def get_json_pagination(self, paginator, page):
+        """
+        Returns the pagination metadata of the JSON list.
+        """
+        if page is None:
+            return None
+        if self.get_pagination() == 'keyset':
+            return {
+                'per_page': paginator.per_page,
+                'next': page.next_cursor(),
+                'previous': page.previous_cursor(),
+                }
+        return {
+            'page': page.number,
+            'per_page': paginator.per_page,
+            'num_pages': paginator.num_pages,
+            'count': paginator.count,
+            'count_is_approximate': paginator.count_is_approximate,
+            'next': page.next_page_number() if page.has_next() else None,
+            'previous': page.previous_page_number() if page.has_previous() else None,
+            }
+
+    def render_json_list(self):
+        """
+        Returns the current page of the list as JSON:
+
+            {
+                "columns": [{"name": <name>, "label": <label>}, ...],
+                "rows": [{"pk": <pk>, "values": [...], "editable": <bool>,
+                          "deletable": <bool>}, ...],
+                "pagination": {...},
+                "allow_create": <bool>, "allow_edit": <bool>,
+                "allow_delete": <bool>
+            }
+
+        The page is determined by the same GET arguments as for the HTML list
+        and none of the template machinery is involved.
+        """
+        queryset = self.get_queryset()
+        page_size = self.get_paginate_by(queryset)
+        paginator = page = None
+        object_list = queryset
+        if page_size:
+            paginator, page, object_list, is_paginated = \
+                    self.paginate_queryset(queryset, page_size)
+        data = {
+            'columns': [{'name': column.name, 'label': force_text(column.label)}
+                for column in self.get_column_plan().columns],
+            'rows': self.get_json_rows(object_list),
+            'pagination': self.get_json_pagination(paginator, page),
+            'allow_create': bool(self.get_allow_create()),
+            'allow_edit': bool(self.get_allow_edit()),
+            'allow_delete': bool(self.get_allow_delete()),
+            }
+        return HttpResponse(json.dumps(data, cls=DjangoJSONEncoder,
+            separators=(',', ':')), content_type='application/json')
+
+    def render_rows(self, context, rows, offset=0):
+        """
+        Renders the rows using the item template and returns the resulting
+        HTML. offset is the index of the first row in the list.
+
+        The item template is loaded once and rendered for each row against
+        a single context holding the state common to all rows (see
+        get_rows_context()) over which each row's own state (see
+        get_row_context()) is pushed. 'context' can either be a template
+        Context or a dictionary.
+        """
+        if not isinstance(context, BaseContext):
+            context = make_context(context, self.request)
+        template = Engine.get_default().get_template(self.get_item_template())
+        if context.template is None:
+            with context.bind_template(template):
+                return self._render_rows(template, context, rows, offset)
+        return self._render_rows(template, context, rows, offset)
+
+    def _render_rows(self, template, context, rows, offset):
+        columns = self.get_column_plan().columns
+        rows_context = self.get_rows_context()
+        row_cache = self.get_row_cache()
+        rows = list(rows)
+        if self._timings is not None:
+            self._timings.rows += len(rows)
+        flags = self.get_rows_flags(rows)
+        output = []
+        with context.push(rows_context):
+            if row_cache is None:
+                for index, obj in enumerate(rows):
+                    with context.push(self.get_row_context(obj, offset+index,
+                            columns, flags[index])):
+                        output.append(template.render(context))
+                return mark_safe(u''.join(output))
+
+            signature = self.get_row_cache_signature(context, rows_context)
+            keys = row_cache.get_keys(self.get_model(), rows,
+                    [u'%s|%d|%s' % (signature, offset+index, flags[index])
+                        for index in range(len(rows))],
+                    self.row_version_field)
+            fragments = row_cache.get_many(keys)
+            rendered = {}
+            for index, obj in enumerate(rows):
+                fragment = fragments.get(keys[index])
+                if fragment is None:
+                    with context.push(self.get_row_context(obj, offset+index,
+                            columns, flags[index])):
+                        fragment = template.render(context)
+                    rendered[keys[index]] = fragment
+                output.append(fragment)
+            row_cache.set_many(rendered)
+        return mark_safe(u''.join(output))
+
+    def get_row_cache(self):
+        """
+        Returns the RowCache for this request or None if row caching is
+        disabled.
+        """
+        if not self.row_cache:
+            return None
+        if getattr(self, '_row_cache', None) is None:
+            self._row_cache = RowCache(self.row_cache_alias,
+                    self.row_cache_timeout)
+            self.connect_signals()
+        return self._row_cache
+
+    def connect_signals(self):
+        """
+        Connects the post_save/post_delete receivers that invalidate the
+        view's cached rows and change stamps. Called on the first use of the
+        row cache and of the change stamps; the receivers are connected once
+        per view class and process.
+
+        Receivers are connected for the model, the related models displayed
+        in the columns and the models of the edit form. Views that validate
+        pages against other models (see get_conditional_models()) extend
+        this method to connect them as well.
+        """
+        cls = self.__class__
+        if cls.__dict__.get('_signals_connected'):
+            return
+        if self.row_cache:
+            RowCache(self.row_cache_alias, self.row_cache_timeout).\
+                    connect_signals(self.get_model(),
+                            self.get_row_cache_dependencies())
+        if self.conditional_get:
+            models = [self.get_model()]
+            for model in self.get_row_cache_dependencies() + \
+                    self.get_form_models():
+                if model not in models:
+                    models.append(model)
+            self.get_change_stamps().connect_signals(models)
+        cls._signals_connected = True
+
+    def get_row_cache_dependencies(self):
+        """
+        Returns the related models whose rows are displayed in the list
+        columns. Saving or deleting a row of these models invalidates all
+        the cached rows.
+        """
+        plan = self.get_column_plan()
+        dependencies = []
+        for path in plan.select_related + plan.prefetch_related:
+            model = self.get_model()
+            for part in path.split(LOOKUP_SEP):
+                model = get_model_field(model, part).related_model
+                if model not in dependencies and model != self.get_model():
+                    dependencies.append(model)
+        return dependencies
+
+    def get_change_stamps(self):
+        return ChangeStamps(self.change_stamp_alias)
+
+    def get_conditional_models(self):
+        """
+        Returns the list of models whose change stamps the validators of the
+        requested page are built from or None if the page is not validated.
+
+        For the list (and its rows fragments) these are the model and the
+        related models displayed in the columns. For the edit page, the models of the form's choices and
+        of the formset.
+        """
+        op = self.get_op()
+        if not op or op == 'rows':
+            return [self.get_model()] + self.get_row_cache_dependencies()
+        if op != 'edit':
+            return None
+        return self.get_form_models()
+
+    def get_form_models(self):
+        """
+        Returns the models of the edit form's choices and of its formset.
+        """
+        models = []
+        for field in self.get_form_class().base_fields.values():
+            queryset = getattr(field, 'queryset', None)
+            if queryset is not None and queryset.model not in models:
+                models.append(queryset.model)
+        formset_class = self.get_formset_class()
+        if formset_class is not None and hasattr(formset_class, 'model') and \
+                formset_class.model not in models:
+            models.append(formset_class.model)
+        return models
+
+    def get_conditional_validators(self):
+        """
+        Returns the 2-tuple (etag, last_modified) of the requested page, where
+        last_modified is a timestamp or None, or None if the page is not
+        validated.
+
+        Validators are built from the change stamps of
+        get_conditional_models(), the row's version for the edit page,
+        the querystring, the Accept header, the user, the language and the
+        timezone. Pages with pending messages are not validated as the
+        messages are displayed only once.
+        """
+        models = self.get_conditional_models()
+        if models is None or len(messages.get_messages(self.request)):
+            return None
+        self.connect_signals()
+        change_stamps = self.get_change_stamps()
+        stamps = change_stamps.get_many(models)
+        last_modified = change_stamps.last_modified(stamps)
+        user = getattr(self.request, 'user', None)
+        parts = [self.__class__.__module__, self.__class__.__name__,
+                self.version, self.request.get_full_path(),
+                self.request.META.get('HTTP_ACCEPT', ''),
+                getattr(user, 'pk', None), translation.get_language(),
+                timezone.get_current_timezone_name()] + stamps
+        if self.get_op() == 'edit':
+            item = self.get_item()
+            version = RowCache().get_versions([item], self.row_version_field)[0]
+            parts.append(version)
+            if isinstance(version, datetime):
+                if timezone.is_naive(version):
+                    version = timezone.make_aware(version)
+                version = calendar.timegm(version.utctimetuple())
+                last_modified = max(version, last_modified or 0)
+            else:
+                last_modified = None
+        etag = hashlib.md5(force_bytes(u'|'.join([force_text(part)
+            for part in parts]))).hexdigest()
+        return etag, last_modified
+
+    def get_conditional_response(self, respond):
+        """
+        Returns 304 Not Modified if the request's conditional headers match
+        the validators of the requested page, or else the response returned
+        by respond(), with the validators in its ETag and Last-Modified
+        headers. Returns respond() as is if conditional_get is off.
+        """
+        validators = None
+        if self.conditional_get:
+            validators = self.get_conditional_validators()
+        if validators is None:
+            return respond()
+        etag, last_modified = validators
+        if is_not_modified(self.request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = respond()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = quote_etag(etag)
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Cookie', 'Accept'))
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_row_cache_signature(self, context, rows_context):
+        """
+        Returns a string capturing the state, common to all rows, that goes
+        into rendering a row.
+        """
+        return u'%s.%s|%s|%s|%s|%s|%s|%s|%s' % (
+                self.__class__.__module__, self.__class__.__name__,
+                rows_context['item_template'],
+                self.get_column_plan().list_display,
+                rows_context['allow_edit'], rows_context['allow_delete'],
+                [action.key for action in rows_context['item_actions']],
+                bool(context.get('actions')),
+                '%s|%s' % (translation.get_language(),
+                    timezone.get_current_timezone_name()))
+
+    def invalidate_rows(self, pks):
+        """
+        Invalidates the cached rows with the given primary keys. Called after
+        rows have been edited or deleted.
+        """
+        row_cache = self.get_row_cache()
+        if row_cache is not None:
+            row_cache.invalidate(self.get_model(), pks)
+
+    def get_rows_context(self):
+        """
+        Returns the context for rendering the item template that is common
+        to all rows of the list.
+        """
+        return {
+            'item_template': self.get_item_template(),
+            'item_actions': self.get_item_actions(),
+            'allow_edit': self.allow_edit,
+            'allow_delete': self.allow_delete,
+            'btn_class': 'btn-sm',
+            }
+
+    def get_row_flags(self, obj):
+        """
+        Returns the 2-tuple (item_editable, item_deletable) for obj. The
+        edit and delete operations check the item with it, so that they
+        honour the flags' annotations as the list does.
+        """
+        return self.get_rows_flags([obj])[0]
+
+    def get_rows_flags(self, objects):
+        """
+        Returns a list of 2-tuples (item_editable, item_deletable), one for
+        each object in objects. Flags are determined for all the objects
+        together through items_editable() and items_deletable().
+        """
+        editable = self.items_editable(objects)
+        deletable = self.items_deletable(objects)
+        flags = []
+        for obj in objects:
+            readonly = getattr(obj, 'is_readonly', False)
+            flags.append((not readonly and editable.get(obj.pk, False),
+                not readonly and deletable.get(obj.pk, False)))
+        return flags
+
+    def get_row_context(self, obj, rowindex, columns=None, flags=None):
+        """
+        Returns the context for rendering the item template for obj, which
+        includes the rendered list_display column values in 'cells'.
+        """
+        if columns is None:
+            columns = self.get_column_plan().columns
+        if flags is None:
+            flags = self.get_row_flags(obj)
+        return {
+            'object': obj,
+            'item': obj,
+            'rowindex': rowindex,
+            'item_editable': flags[0],
+            'item_deletable': flags[1],
+            'cells': [mark_safe(force_text(column.value(self, obj)))
+                for column in columns] if not isinstance(obj, ListRow) else
+                [mark_safe(force_text(column.format(self, value)))
+                    for column, value in zip(columns, obj.values)],
+            }
+
     def _get_form_helper(self, form_class, **kwargs):
         '''
         Helper function to return a form class instance where the
@@ -413,20 +2265,35 @@ class CRUDView(PaginationMixin, ListView):
         CustomRelatedFieldWidgetWrapper so that inline edit/add
         operations can be supported like in admin CRUD.
 
-        Note that this method is only necessary to be invoked for
-        those cases where the form is returned in the context to be
-        rendered by the template. For POST request data validation, the
-        original self.get_form() method is used.
+        Widgets are replaced only when the form is rendered for a GET. The
+        wrapped Select lists all its choices, which is a query that a POST
+        does not need unless the form has errors, in which case the POST
+        handlers replace them with set_form_widgets() before rendering it.
         '''
         form = self.get_form(form_class, **kwargs)
+        if self.request.method != 'POST':
+            self.set_form_widgets(form)
+        return form
+
+    def set_form_widgets(self, form):
+        '''
+        Replaces the widgets of the form's related fields for rendering.
+        The replacement widgets read the submitted data the same way as the
+        original ones.
+        '''
         # If related_field_crud_urls was specified, iterate through all the
         # form's fields and if any of the fields is an instance of
         # ForeignKey and the user has requested the related model to be
         # editable inline, replace its widget with our
         # CustomRelatedFieldWidgetWrapper that allows this.
+        # Fields that fetch their choices on demand are rendered only with
+        # the selected value through AutocompleteSelect.
+        autocomplete_fields = self.get_autocomplete_fields()
         for field in self.model._meta.fields:
             if isinstance(field, models.ForeignKey) and \
-                    field.name in self.related_field_crud_urls:
+                    field.name in self.related_field_crud_urls and \
+                    field.name in form.fields and \
+                    field.name not in autocomplete_fields:
                 # replace the form field's widget with CRFWW
                 form_field_ = form.fields[field.name]
                 from django.forms import Select
@@ -434,18 +2301,101 @@ class CRUDView(PaginationMixin, ListView):
                         Select(choices=form_field_.choices),
                         self.related_field_crud_urls[field.name],
                         True)
-        # replace the widget for those fields
-        for field in self.model._meta.fields:
-            if isinstance(field, models.ForeignKey) and \
-                    field.name in self.related_field_crud_urls:
-                # replace the form field's widget with CRFWW
-                form_field_ = form.fields[field.name]
-                from django.forms import Select
-                form_field_.widget = CustomRelatedFieldWidgetWrapper(
-                        Select(choices=form_field_.choices),
-                        self.related_field_crud_urls[field.name],
-                        True)
-        return form
+        for name in autocomplete_fields:
+            if name not in form.fields:
+                continue
+            form_field_ = form.fields[name]
+            widget = AutocompleteSelect(self.get_lookup_url(name),
+                    queryset=form_field_.queryset,
+                    to_field_name=form_field_.to_field_name,
+                    empty_label=form_field_.empty_label or u"---------")
+            if name in self.related_field_crud_urls:
+                widget = CustomRelatedFieldWidgetWrapper(widget,
+                        self.related_field_crud_urls[name], True)
+            form_field_.widget = widget
+
+    def get_autocomplete_fields(self):
+        """
+        Returns the dictionary of autocomplete fields and the related model
+        fields that the search term is matched against for each.
+        """
+        return self.autocomplete_fields
+
+    def get_lookup_url(self, name):
+        """
+        Returns the URL of the lookup operation for the autocomplete field
+        'name'.
+        """
+        return u'%s?o=lookup&field=%s' % (self.request.path, name)
+
+    def get_lookup_queryset(self, field):
+        """
+        Returns the queryset of the choices of the ForeignKey field, which is
+        the queryset of the field in the form built by get_form(). The lookup
+        then offers the choices that the form accepts, limit_choices_to and
+        any restriction applied by get_form() included.
+        """
+        form = self.get_form(self.get_form_class())
+        queryset = getattr(form.fields.get(field.name), 'queryset', None)
+        if queryset is None:
+            raise Http404
+        return queryset.all()
+
+    def lookup(self, request):
+        """
+        Handles the lookup operation, which returns a page of the choices of
+        an autocomplete field that match the search term as JSON:
+
+            {"results": [{"id": <value>, "text": <label>}, ...], "more": <bool>}
+
+        Choices are matched on the prefix of the field's search fields
+        (LOOKUP_DEFAULT_TYPE) and ordered by the first of them. Pages are
+        fetched by slicing without counting the matches; 'more' indicates if
+        there's a next page.
+
+        GET arguments:
+            field - name of the autocomplete field
+            q - the search term
+            page - 1-based page number
+        """
+        name = request.GET.get('field', '')
+        search_fields = self.get_autocomplete_fields().get(name)
+        field = get_model_field(self.get_model(), name)
+        if not search_fields or not isinstance(field, models.ForeignKey):
+            raise Http404
+        paths = []
+        for search_field in search_fields:
+            parts = search_field.split(LOOKUP_SEP)
+            if len(parts) > 1 and parts[-1] in LOOKUP_SEARCH_TYPES:
+                paths.append((LOOKUP_SEP.join(parts[:-1]), parts[-1]))
+            else:
+                paths.append((search_field, LOOKUP_DEFAULT_TYPE))
+
+        queryset = self.get_lookup_queryset(field)
+        term = request.GET.get('q', '').strip()
+        if term:
+            condition = models.Q()
+            for path, lookup in paths:
+                condition |= models.Q(**{'%s__%s' % (path, lookup): term})
+            queryset = queryset.filter(condition)
+        if paths[0][0] != 'pk':
+            queryset = queryset.order_by(paths[0][0], 'pk')
+        else:
+            queryset = queryset.order_by('pk')
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        size = self.lookup_page_size
+        rows = list(queryset[(page-1)*size:page*size+1])
+        target_field = field.foreign_related_fields[0]
+        return JsonResponse({
+            'results': [{
+                'id': getattr(obj, target_field.attname),
+                'text': force_text(obj),
+                } for obj in rows[:size]],
+            'more': len(rows) > size,
+            })
 
     def get_add_context_data(self, **kwargs):
         '''Return context data for add opereation'''
@@ -453,53 +2403,76 @@ class CRUDView(PaginationMixin, ListView):
         context['add'] = True
         context['pagetitle'] = _("New %s") % (self.get_model()._meta.verbose_name.title())
         if 'form' not in context:
-            context['form'] = self._get_form_helper(self.get_form_class())
+            context['form'] = self.get_request_form()
         if self.get_formset_class() and 'formset' not in context:
-            context['formset'] = self.get_formset(self.get_formset_class())
+            context['formset'] = self.get_request_formset()
         return context
 
     def get_edit_context_data(self, **kwargs):
         '''Return context data for edit opereation'''
         context = kwargs
-        _object = self.get_model().objects.get(pk=self.request.GET.get('item'))
+        _object = self.get_item()
         object_title = _object._meta.verbose_name.title()
-        item = self.get_model().objects.get(pk=self.request.GET.get('item'))
         context['object'] = _object
         context['edit'] = True
         context['pagetitle'] = _("Edit %s") % object_title
         if 'form' not in context:
-            context['form'] = self._get_form_helper(self.get_form_class(),
-                    instance=_object)
+            context['form'] = self.get_request_form(instance=_object)
         if self.get_formset_class() and 'formset' not in context:
-            context['formset'] = self.get_formset(self.get_formset_class(),
-                    instance=_object)
+            context['formset'] = self.get_request_formset(instance=_object)
+        page = self._formset_page
+        if page is not None and page.paginator.num_pages > 1:
+            context['formset_page'] = page
+            if page.has_previous():
+                context['formset_previous_url'] = self.get_formset_page_url(
+                        page.previous_page_number())
+            if page.has_next():
+                context['formset_next_url'] = self.get_formset_page_url(
+                        page.next_page_number())
         return context
 
     def get_delete_context_data(self, **kwargs):
         '''Return context data for delete operation'''
         context = kwargs
-        _object = self.get_model().objects.get(pk=self.request.GET.get('item'))
+        _object = self.get_item()
         object_title = _object._meta.verbose_name.title()
         context['object'] = _object
         context['pagetitle'] = _("Delete %s") % object_title
         context['delete_msg'] = _("Are you sure you want to delete the %s: %s?") \
                 % (self.get_model()._meta.verbose_name.title(), str(_object))
         context['delete_item_custom_url'] = self.get_delete_item_custom_url(),
+        counts = self.get_delete_counts(
+                self.get_model()._base_manager.filter(pk=_object.pk))
+        # the object itself is mentioned in the message
+        context['delete_counts'] = [(name, count) for model, name, count in
+                counts if model is not self.get_model()]
         return context
 
     def get_delete_multiple_context_data(self, **kwargs):
         '''Return context data for delete operation'''
         context = kwargs
         item_ids = self.request.GET.get("items")
-        objects = self.get_model().objects.filter(pk__in=item_ids.split(','))
+        objects = self.get_queryset().filter(pk__in=item_ids.split(','))
         object_title = self.get_model()._meta.verbose_name_plural.title()
-        context['objects'] = objects
+        counts = self.get_delete_counts(objects)
+        context['objects'] = list(objects[:self.delete_preview_size])
+        context['objects_count'] = counts[0][2] if counts else 0
+        context['objects_more'] = context['objects_count'] - len(context['objects'])
+        context['delete_counts'] = [(name, count) for model, name, count in counts]
         context['pagetitle'] = _("Delete %s") % object_title
         context['delete_msg'] = _("Are you sure you want to delete the following %s?") \
                          % object_title
         context['delete_item_custom_url'] = self.get_delete_item_custom_url(),
         return context
 
+    def get_import_context_data(self, **kwargs):
+        '''Return context data for import operation'''
+        context = kwargs
+        context['pagetitle'] = _("Import %s") % \
+                self.get_model()._meta.verbose_name_plural.title()
+        context['import_fields'] = list(self.get_form_class().base_fields)
+        return context
+
     def get_paginate_by(self, queryset):
         """
         Overridden to support special page value of 'all' that would disable
@@ -510,35 +2483,172 @@ class CRUDView(PaginationMixin, ListView):
             return None
         return super(CRUDView, self).get_paginate_by(queryset)
 
+    def get_pagination(self):
+        """
+        Returns the pagination mode, the value of pagination option or
+        'keyset' if infinite_scroll is enabled.
+        """
+        return 'keyset' if self.infinite_scroll else self.pagination
+
+    def get_count_strategy(self):
+        """
+        Returns the count strategy object used by the paginator to count
+        the rows in the list.
+        """
+        strategy = self.count_strategy
+        if isinstance(strategy, six.string_types):
+            if strategy not in COUNT_STRATEGIES:
+                raise ImproperlyConfigured("Unknown count_strategy '%s'" % strategy)
+            if strategy == 'cached':
+                return CachedCount(self.count_cache_timeout)
+            return COUNT_STRATEGIES[strategy]()
+        return strategy
+
+    def invalidate_row_count(self, model=None):
+        """
+        Invalidates the row counts of model (defaults to the view's model)
+        cached by the count strategy. Called after rows have been added,
+        changed (a change can move a row in or out of a filtered list) or
+        deleted, and for the model of a saved formset.
+        """
+        self.get_count_strategy().invalidate(model or self.get_model())
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+            allow_empty_first_page=True, **kwargs):
+        """
+        Overridden to count the rows through the view's count strategy.
+        """
+        return CountStrategyPaginator(queryset, per_page,
+                count_strategy=self.get_count_strategy(), orphans=orphans,
+                allow_empty_first_page=allow_empty_first_page,
+                request=self.request)
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Overridden to support keyset pagination.
+        """
+        if self.get_pagination() != 'keyset':
+            return super(CRUDView, self).paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, request=self.request,
+                cursor_kwarg=self.cursor_kwarg)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Overridden to record the timings of the request if server_timing is
+        enabled. The timings of template responses are recorded once they
+        are rendered.
+        """
+        if not self.server_timing:
+            return super(CRUDView, self).dispatch(request, *args, **kwargs)
+        timings = self._timings = RequestTimings()
+        # time the sections through instance attributes that shadow the
+        # methods, so that nothing is timed when disabled
+        for name, method in (('queryset', 'get_queryset'),
+                ('context', 'get_context_data'), ('rows', 'render_rows')):
+            setattr(self, method, timings.wrap(name, getattr(self, method)))
+        timings.start_queries()
+        try:
+            response = super(CRUDView, self).dispatch(request, *args, **kwargs)
+        except Exception:
+            timings.finish()
+            raise
+        if getattr(response, 'is_rendered', True):
+            self.finish_timings(response)
+        else:
+            returned = time.time()
+
+            def rendered(response):
+                timings.add('render', time.time() - returned)
+                self.finish_timings(response)
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish_timings(self, response):
+        """
+        Stops the timings of the request, adds the Server-Timing header to
+        response and passes the timings to record_timings().
+        """
+        timings = self._timings
+        timings.finish()
+        response['Server-Timing'] = timings.server_timing()
+        self.record_timings(timings, response)
+
+    def record_timings(self, timings, response):
+        """
+        Called with the RequestTimings of the request, once the response is
+        rendered, if server_timing is enabled. Logs them, with the timings in
+        the record's 'timings' attribute, and sends the request_timed signal
+        by default.
+        """
+        data = timings.as_dict()
+        logger.info("%s %s %s: %.1fms, %d queries in %.1fms", self.__class__.__name__,
+                self.request.method, self.get_op() or 'list', data['total'],
+                data['queries'], data['db'], extra={'timings': data})
+        request_timed.send(sender=self.__class__, view=self,
+                request=self.request, response=response, timings=timings)
+
     def get(self, request, *args, **kwargs):
         try:
-            if request.GET.get('o', '') == u'add':
+            if not request.GET.get('o') and self.is_json_request():
+                response = self.get_conditional_response(self.render_json_list)
+                # the list is HTML or JSON depending on the Accept header
+                patch_vary_headers(response, ('Accept',))
+                return response
+            elif request.GET.get('o', '') == u'export':
+                if not self.get_allow_export() or \
+                        not self.check_permission('export', None, request):
+                    raise PermissionDenied
+                return self.export(request)
+            elif request.GET.get('o', '') == u'rows':
+                return self.get_conditional_response(self.render_rows_fragment)
+            elif request.GET.get('o', '') == u'lookup':
+                if not (self.get_allow_create() or self.get_allow_edit()) or \
+                        not self.check_permission('lookup', None, request):
+                    raise PermissionDenied
+                return self.lookup(request)
+            elif request.GET.get('o', '') == u'add':
                 if not self.get_allow_create() or \
                         not self.check_permission('add', None, request):
                     raise PermissionDenied
+            elif request.GET.get('o', '') == u'import':
+                if not self.get_allow_create() or not self.get_allow_import() or \
+                        not self.check_permission('import', None, request):
+                    raise PermissionDenied
             elif request.GET.get('o', '') == u'edit' and request.GET.get('item'):
-                item = get_object_or_404(self.get_model(), pk=self.request.GET.get('item'))
+                item = self.get_item()
                 if not self.get_allow_edit() or \
-                        not self.item_editable(item) or \
+                        not self.get_row_flags(item)[0] or \
                         not self.check_permission('edit', item, request):
                     raise PermissionDenied
             elif request.GET.get('o', '') == u'delete' and request.GET.get('item'):
-                item = get_object_or_404(self.get_model(), pk=self.request.GET.get('item'))
+                item = self.get_item()
                 if not self.get_allow_delete() or \
-                        not self.item_deletable(item) or \
+                        not self.get_row_flags(item)[1] or \
                         not self.check_permission('delete', item, request):
                     raise PermissionDenied
             elif request.GET.get('o', '') == u'delete_multiple' and request.GET.get('items'):
                 if not self.get_allow_delete():
                     raise PermissionDenied
-                items = self.request.GET.get("items")
-                objects = self.get_queryset().filter(pk__in=items.split(","))
             else:
                 # invalid request arguments, raise 404
                 pass
-            return super(CRUDView, self).get(request, *args, **kwargs)
+            response = self.get_conditional_response(lambda:
+                    super(CRUDView, self).get(request, *args, **kwargs))
+            if not request.GET.get('o'):
+                patch_vary_headers(response, ('Accept',))
+            return response
         except ObjectDoesNotExist:
             raise Http404
+        except PermissionDenied:
+            if not self.is_partial_request():
+                raise
+            return self.get_partial_error_response(
+                    _("You are not allowed to change this item."))
 
     def post(self, request, *args, **kwargs):
         # do one of ADD, EDIT or DELETE operations
@@ -549,10 +2659,28 @@ class CRUDView(PaginationMixin, ListView):
             'delete': self.post_delete,
             'action': self.post_action,
             'delete_multiple': self.post_delete,
+            'import': self.post_import,
             }
         op = self.get_op(request)
         if op in op_handler.keys():
-            return op_handler[op](request, *args, **kwargs)
+            try:
+                response = op_handler[op](request, *args, **kwargs)
+            except PermissionDenied:
+                if not self.is_partial_request():
+                    raise
+                return self.get_partial_error_response(
+                        _("You are not allowed to change this item."))
+            if self.conditional_get:
+                # rows may have been changed without sending signals, such
+                # as the formset's bulk updates
+                change_stamps = self.get_change_stamps()
+                models = [self.get_model()]
+                for model in self.get_conditional_models() or []:
+                    if model not in models:
+                        models.append(model)
+                for model in models:
+                    change_stamps.touch(model)
+            return response
         return HttpResponseRedirect(self.get_opless_path())
 
     def post_add(self, request, *args, **kwargs):
@@ -561,7 +2689,7 @@ class CRUDView(PaginationMixin, ListView):
                 not self.check_permission('add', None, request):
             raise PermissionDenied
         try:
-            form = self.get_form(self.get_form_class(), data=self.request.POST)
+            form = self.get_request_form(data=self.request.POST)
             context_args = {}
             context_args['form'] = form
 
@@ -571,17 +2699,20 @@ class CRUDView(PaginationMixin, ListView):
                     # late instantiation of formset as item object is available
                     # only after form.save() is called (thru self.save_form)
                     if self.get_formset_class():
-                        formset = self.get_formset(self.get_formset_class(),
+                        formset = self.get_request_formset(
                                 data=self.request.POST, instance=item)
                         context_args['formset'] = formset
                         if formset.is_valid():
-                            formset.save()
+                            self.save_formset(request, formset)
                         else:
                             raise ValidationError(_("Some of the item rows have errors"))
 
+                    self.invalidate_row_count()
                     if "_popup" in request.POST:
                         return HttpResponse('<script type="text/javascript">opener.dismissAddRelatedObjectPopup(window, "%s", "%s");</script>' % \
                                 (escape(item.pk), escapejs(item)))
+                    if self.is_partial_request():
+                        return self.get_partial_row_response(item.pk)
                     return HttpResponseRedirect(self.get_opless_path())
         except IntegrityError as ie:
             form._errors[forms.NON_FIELD_ERRORS] = form.error_class(ie.messages)
@@ -590,37 +2721,92 @@ class CRUDView(PaginationMixin, ListView):
 
         # re-render the view with the form together with the
         # erroneous data and error messages
+        self.set_form_widgets(form)
         context = self.get_context_data(**context_args)
         if form._errors and len(form._errors) > 0:
             context['form_haserrors'] = True
 
         return self.render_to_response(context)
 
+    def get_import_field_map(self, form_class):
+        """
+        Returns the dictionary that maps the column names of the imported
+        file to the form's field names. Besides the field names, the form
+        fields' labels (which export uses as the CSV header) are accepted.
+        """
+        fields = {}
+        for name, field in form_class.base_fields.items():
+            if field.label:
+                fields[force_text(field.label)] = name
+        return fields
+
+    def post_import(self, request, *args, **kwargs):
+        # import rows from the uploaded file
+        if not self.get_allow_create() or not self.get_allow_import() or \
+                not self.check_permission('import', None, request):
+            raise PermissionDenied
+        context_args = {}
+        upload = request.FILES.get('file')
+        fmt = request.POST.get('fmt') or request.GET.get('fmt', 'csv')
+        if upload is None or fmt not in IMPORT_FORMATS:
+            context_args['import_error'] = _("Select a CSV or NDJSON file to import")
+        else:
+            form_class = self.get_form_class()
+            report = BulkImport(form_class, batch_size=self.import_batch_size,
+                    max_errors=self.import_max_errors,
+                    fields=self.get_import_field_map(form_class),
+                    get_form=self.get_form)
+            try:
+                report.run(IMPORT_FORMATS[fmt](upload))
+            except (ValueError, csv.Error) as e:
+                # malformed file, rows read so far have been imported
+                context_args['import_error'] = _("Error reading the file: %s") % e
+            if report.created:
+                self.invalidate_row_count()
+            logger.info("%s: imported %d of %d rows in %.2fs (%d rows/s)",
+                    self.__class__.__name__, report.created, report.rows,
+                    report.elapsed, report.rows_per_second)
+            context_args['report'] = report
+            if self.is_json_request():
+                return JsonResponse({
+                    'rows': report.rows,
+                    'created': report.created,
+                    'failed': report.failed,
+                    'errors': [{'row': number, 'errors': errors}
+                        for number, errors in report.errors],
+                    'elapsed': report.elapsed,
+                    'rows_per_second': report.rows_per_second,
+                    'error': force_text(context_args.get('import_error', '')) or None,
+                    })
+        return self.render_to_response(self.get_context_data(**context_args))
+
     def post_edit(self, request, *args, **kwargs):
         # edit
         try:
-            item = get_object_or_404(self.get_model(), pk=self.request.GET.get('item'))
+            item = self.get_item()
             if not self.get_allow_edit() or \
-                    not self.item_editable(item) or \
+                    not self.get_row_flags(item)[0] or \
                     not self.check_permission('edit', item, request):
                 raise PermissionDenied
-            form = self.get_form(self.get_form_class(), instance=item, data=self.request.POST,
+            form = self.get_request_form(instance=item, data=self.request.POST,
                         files=request.FILES)
             context_args = {}
             context_args['form'] = form
 
             # early instantiation of formset class as we have the item object
             if self.get_formset_class():
-                formset = self.get_formset(self.get_formset_class(),
+                formset = self.get_request_formset(
                         data=self.request.POST, instance=item)
                 context_args['formset'] = formset
 
             if form.is_valid():
                 with transaction.atomic():
                     item = self.save_form(request, form, True, True)
+                    self.invalidate_row_count()
+                    self.invalidate_rows([item.pk])
                     if self.get_formset_class():
                         if formset.is_valid():
-                            formset.save()
+                            self.save_formset(request, formset)
                         else:
                             raise ValidationError(_("Some of the item rows have errors"))
 
@@ -628,6 +2814,8 @@ class CRUDView(PaginationMixin, ListView):
                         return HttpResponse('<script type="text/javascript">opener.dismissAddRelatedObjectPopup(window, "%s", "%s");</script>' % \
                                 (escape(item.pk), escapejs(item)))
                     msg = _('%s details updated') % self.get_model()._meta.verbose_name.title()
+                    if self.is_partial_request():
+                        return self.get_partial_row_response(item.pk, msg)
                     messages.info(self.request, msg)
                     self.object_list = self.get_queryset()
                     return HttpResponseRedirect(self.get_opless_path())
@@ -639,6 +2827,7 @@ class CRUDView(PaginationMixin, ListView):
             pass
         # form has validation errors; re-render the view with the
         # form together with the erroneous data and error messages
+        self.set_form_widgets(form)
         context = self.get_context_data(**context_args)
         if form._errors and len(form._errors) > 0:
             context['form_haserrors'] = True
@@ -651,27 +2840,72 @@ class CRUDView(PaginationMixin, ListView):
             if not self.get_allow_delete():
                 raise PermissionDenied
             objects = self.get_queryset().filter(pk__in=item_ids.split(","))
-            objects.delete()
+            deleted = self.get_bulk_delete(objects).run()
+            self.invalidate_row_count()
+            self.invalidate_rows(item_ids.split(","))
             msg = _('Selected %s have been deleted') % self.get_model()._meta.verbose_name_plural.title()
+            messages.info(self.request, u'%s (%s)' % (msg,
+                self.get_deleted_summary(deleted)))
         else:
-            item = get_object_or_404(self.get_model(), pk=self.request.GET.get('item'))
+            item = self.get_item()
             if not self.get_allow_delete() or \
-                    not self.item_deletable(item) or \
+                    not self.get_row_flags(item)[1] or \
                     not self.check_permission('delete', item, request):
                 raise PermissionDenied
-            # verify global delete view flag and individual item deletable flag
-            # (if it was specified) before doing the actual deletion.
-            if not getattr(item, 'is_readonly', False) and \
-                    self.item_deletable(item):
-                item.delete()
-                msg = _('%s %s deleted') % (self.get_model()._meta.verbose_name.title(), item)
-                messages.info(self.request, msg)
+            pk = item.pk
+            item.delete()
+            self.invalidate_row_count()
+            self.invalidate_rows([pk])
+            msg = _('%s %s deleted') % (self.get_model()._meta.verbose_name.title(), item)
+            if self.is_partial_request():
+                return JsonResponse({'pk': pk, 'row': u'',
+                    'message': force_text(msg)})
+            messages.info(self.request, msg)
         return HttpResponseRedirect(self.get_opless_path())
 
+    def get_bulk_delete(self, queryset):
+        """
+        Returns the BulkDelete object that deletes the rows of queryset for
+        the delete_multiple operation.
+        """
+        return BulkDelete(queryset, batch_size=self.delete_batch_size,
+                progress=self.bulk_delete_progress)
+
+    def bulk_delete_progress(self, bulk_delete):
+        """
+        Called after each batch of rows is deleted by delete_multiple.
+        Logs the progress by default.
+        """
+        logger.info("%s: deleted %d of %d %s in %d batches%s",
+                self.__class__.__name__, bulk_delete.rows_deleted,
+                bulk_delete.total,
+                force_text(self.get_model()._meta.verbose_name_plural),
+                bulk_delete.batches, " (fast)" if bulk_delete.fast else "")
+
+    def get_delete_counts(self, queryset):
+        """
+        Returns the number of rows that deleting queryset would delete, per
+        model, as a list of 3-tuples (model, name, count) where name is the
+        model's verbose name appropriate for count. Counts are determined with
+        COUNT queries, see deletion.get_cascade_counts().
+        """
+        return [(model, force_text(model._meta.verbose_name if count == 1
+                else model._meta.verbose_name_plural), count)
+                for model, count in get_cascade_counts(queryset).items()]
+
+    def get_deleted_summary(self, deleted):
+        """
+        Returns the text summarizing the number of rows deleted for each
+        model, given the dictionary of counts indexed by the model.
+        """
+        return u', '.join([u'%d %s' % (count, force_text(
+            model._meta.verbose_name if count == 1 else
+            model._meta.verbose_name_plural)) for model, count in deleted.items()])
+
     def post_action(self, request, *args, **kwargs):
         # custom action
         response = self.invoke_action(request);
-        if isinstance(response, HttpResponse):
+        if isinstance(response, HttpResponseBase):
             return response
         return HttpResponseRedirect(self.get_opless_path())
 
@@ -695,7 +2929,7 @@ class CRUDView(PaginationMixin, ListView):
             for ia in self.get_item_actions():
                 # find matching ItemAction object
                 if ia.key == handler:
-                    return ia.doAction(self.get_model().objects.get(pk=item_id))
+                    return ia.doAction(self.get_item())
             return
 
         # action to be performed on multiple items
@@ -717,17 +2951,42 @@ class CRUDView(PaginationMixin, ListView):
                           to editing an item. Set to False for 'add's
 
             :: returns the created object (python object)
+
+        If update_changed_fields is set, edits of the requested item save
+        only the fields whose values the form changed, with update_fields,
+        and skip the save if none did. Many-to-many fields are saved as
+        usual. The number of columns written is added to columns_written.
         """
-        return form.save(True)
+        item = self._item
+        if not change or not self.update_changed_fields or item is None or \
+                form.instance is not item:
+            obj = form.save(True)
+            self.columns_written += len([field for field in
+                obj._meta.concrete_fields if not field.primary_key])
+            return obj
+        obj = form.save(commit=False)
+        fields = get_changed_fields(obj, self._item_values)
+        if fields:
+            obj.save(update_fields=fields)
+            self._item_values = get_field_values(obj)
+        form.save_m2m()
+        self.columns_written += len(fields)
+        logger.debug("%s: %s %s saved, %d columns written (%s)",
+                self.__class__.__name__, obj._meta.object_name, obj.pk,
+                len(fields), ', '.join(fields))
+        return obj
 
     def __get_actions_with_delete(self):
         '''
         Helper to return the action handlers, including the multiple item
         delete action, if it was enabled.
         '''
-        actions = self.get_actions()
+        actions = list(self.get_actions() or [])
         if self.get_allow_multiple_item_delete():
             actions.append((_('Delete'), self.__delete_multiple_items))
+        if self.get_allow_export():
+            actions.append((_('Export as CSV'), self.__export_csv))
+            actions.append((_('Export as NDJSON'), self.__export_ndjson))
         return actions
 
     def __delete_multiple_items(self, request, items):
@@ -741,6 +3000,22 @@ class CRUDView(PaginationMixin, ListView):
         '''
         pass
 
+    def __export_csv(self, request, items):
+        '''
+        Action to export the selected items as CSV.
+        '''
+        if not self.check_permission('export', None, request):
+            raise PermissionDenied
+        return self.render_export(items, 'csv')
+
+    def __export_ndjson(self, request, items):
+        '''
+        Action to export the selected items as NDJSON.
+        '''
+        if not self.check_permission('export', None, request):
+            raise PermissionDenied
+        return self.render_export(items, 'ndjson')
+
     def get_formatters(self):
         '''Override to return custom formatters for known types here.'''
         return {}
@@ -788,6 +3063,21 @@ class CRUDView(PaginationMixin, ListView):
     def get_allow_delete(self):
         return self.allow_delete
 
+    def get_allow_export(self):
+        return self.allow_export
+
+    def get_allow_import(self):
+        return self.allow_import
+
+    def get_export_fields(self):
+        """
+        Returns the names of the columns exported by the export operation,
+        which are export_fields, if specified, or else list_display.
+        """
+        if self.export_fields is not None:
+            return self.export_fields
+        return self.list_display
+
     def get_allow_multiple_item_delete(self):
         return self.allow_multiple_item_delete
 
@@ -835,3 +3125,44 @@ class CRUDView(PaginationMixin, ListView):
         """
         return True
 
+    def items_deletable(self, objects):
+        """
+        Return a dictionary of booleans, indexed by the object's pk, to
+        indicate if each of the objects can be deleted.
+
+        Called once for all the rows in a list page. Override to determine
+        the flags for all the objects together (with a single query, for
+        eg.). By default uses the row annotation from
+        get_item_deletable_annotation(), if available, and falls back
+        to calling item_deletable() for each object otherwise.
+        """
+        return dict([(obj.pk, getattr(obj, DELETABLE_ANNOTATION)
+            if hasattr(obj, DELETABLE_ANNOTATION) else self.item_deletable(obj))
+            for obj in objects])
+
+    def items_editable(self, objects):
+        """
+        Same as items_deletable, but for editing the objects.
+        """
+        return dict([(obj.pk, getattr(obj, EDITABLE_ANNOTATION)
+            if hasattr(obj, EDITABLE_ANNOTATION) else self.item_editable(obj))
+            for obj in objects])
+
+    def get_item_deletable_annotation(self):
+        """
+        Return a query expression that evaluates to a boolean indicating if
+        the row can be deleted (defaults to None). If specified, the list
+        queryset is annotated with it so that the flags are computed in the
+        page query itself. For eg.:
+
+            return Case(When(author__isnull=True, then=Value(True)),
+                        default=Value(False), output_field=BooleanField())
+        """
+        return None
+
+    def get_item_editable_annotation(self):
+        """
+        Same as get_item_deletable_annotation, but for editing the row.
+        """
+        return None
+
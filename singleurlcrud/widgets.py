@@ -1,6 +1,9 @@
 """
 Defines replacement widgets that CRUDView uses.
 """
+from django.core.validators import EMPTY_VALUES
+from django.forms import Select
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _
 from django.utils.safestring import mark_safe
 from django.contrib.admin.widgets import RelatedFieldWidgetWrapper
@@ -49,3 +52,51 @@ class CustomRelatedFieldWidgetWrapper(RelatedFieldWidgetWrapper):
                     (add_url, name))
             output.insert(3, '<span class="glyphicon glyphicon-plus" title="%s"/></a>' % (_('Add new')))
         return mark_safe(u''.join(output))
+
+
+class AutocompleteSelect(Select):
+    """
+    Select widget for ForeignKey fields whose related table is too large to
+    be rendered as <option>s in its entirety.
+
+    Only the empty choice and the currently selected value are rendered.
+    Other choices are fetched on demand, as the user types in the search box
+    that autocomplete.js adds in front of the select, from lookup_url, which
+    returns them a page at a time as JSON (see CRUDView's lookup operation).
+
+    Parameters:
+        lookup_url - URL that returns the choices matching the GET
+                     argument 'q'
+        queryset - queryset from which the label of the selected value is
+                   retrieved
+        to_field_name - name of the field whose value is the select's value,
+                   defaults to the primary key
+    """
+    class Media:
+        js = ('singleurlcrud/js/autocomplete.js', )
+
+    def __init__(self, lookup_url, queryset=None, to_field_name=None,
+            attrs=None, empty_label=u"---------"):
+        super(AutocompleteSelect, self).__init__(attrs)
+        self.lookup_url = lookup_url
+        self.queryset = queryset
+        self.to_field_name = to_field_name or 'pk'
+        self.empty_label = empty_label
+        self.attrs['data-lookup-url'] = lookup_url
+
+    def get_selected_choices(self, value):
+        """
+        Returns the choices to be rendered, which are the empty choice and,
+        if value is set, the selected object.
+        """
+        choices = [(u'', self.empty_label)]
+        if value not in EMPTY_VALUES and self.queryset is not None:
+            obj = self.queryset.filter(**{self.to_field_name: value}).first()
+            if obj is not None:
+                choices.append((value, force_text(obj)))
+        return choices
+
+    def render(self, name, value, attrs=None, *args, **kwargs):
+        # CustomRelatedFieldWidgetWrapper resets choices before rendering
+        self.choices = self.get_selected_choices(value)
+        return super(AutocompleteSelect, self).render(name, value, attrs)